@@ -1,6 +1,7 @@
 package main
 
 import (
+	"context"
 	"log"
 	"os"
 
@@ -10,6 +11,7 @@ import (
 	"gen-go/internal/router"
 	"gen-go/internal/service"
 	"gen-go/internal/utils"
+	"gen-go/pkg/redis_limiter"
 
 	"github.com/go-redis/redis/v8"
 	"github.com/sirupsen/logrus"
@@ -42,6 +44,11 @@ func main() {
 		Password: cfg.Redis.Password,
 	})
 
+	// 预加载并发限制器Lua脚本
+	if err := redis_limiter.LoadScripts(context.Background(), redisClient); err != nil {
+		logger.Warnf("预加载Redis脚本失败: %v", err)
+	}
+
 	// 初始化Repository
 	userRepo := repository.NewUserRepository(db)
 	taskRepo := repository.NewTaskRepository(db)
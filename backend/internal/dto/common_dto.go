@@ -46,13 +46,6 @@ type Report struct {
 	CreatedAt   string `json:"created_at"`
 }
 
-// ReportDataResponse 报告数据响应
-type ReportDataResponse struct {
-	TaskID      string                   `json:"task_id"`
-	Data        []map[string]interface{} `json:"data"`
-	Total       int                      `json:"total"`
-}
-
 // ConvertFilesResponse 转换文件响应
 type ConvertFilesResponse struct {
 	Success bool               `json:"success"`
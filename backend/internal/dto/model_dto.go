@@ -77,6 +77,17 @@ type Choice struct {
 	FinishReason string  `json:"finish_reason,omitempty"`
 }
 
+// ModelStreamChunk 流式响应的单个数据块
+type ModelStreamChunk struct {
+	Choices []StreamChoice `json:"choices"`
+}
+
+// StreamChoice 流式响应中的增量选择
+type StreamChoice struct {
+	Delta        Message `json:"delta"`
+	FinishReason string  `json:"finish_reason,omitempty"`
+}
+
 // Usage 使用量
 type Usage struct {
 	PromptTokens     int `json:"prompt_tokens"`
@@ -97,6 +108,7 @@ type ModelCallProxyRequest struct {
 	TopP        float64   `json:"top_p"`
 	RetryTimes  int       `json:"retry_times"`
 	TaskID      string    `json:"task_id,omitempty"`
+	Stream      bool      `json:"stream,omitempty"` // 是否以SSE流式透传上游内容
 }
 
 // ModelCallProxyResponse 模型调用代理响应（返回给Python后端）
@@ -1,5 +1,7 @@
 package dto
 
+import "time"
+
 // StartTaskRequest 启动任务请求
 type StartTaskRequest struct {
 	InputFile         string   `json:"input_file" binding:"required"`
@@ -46,6 +48,7 @@ type TaskInfo struct {
 	Status     string                 `json:"status"`
 	Params     map[string]interface{} `json:"params"`
 	RunTime    float64                `json:"run_time"`
+	StartTime  time.Time              `json:"start_time"`
 	Finished   bool                   `json:"finished"`
 	ReturnCode *int                   `json:"return_code,omitempty"`
 }
@@ -93,7 +93,7 @@ func (h *DataFileHandler) GetFile(c *gin.Context) {
 	userID, _ := middleware.GetUserID(c)
 	fileID, _ := strconv.ParseUint(c.Param("file_id"), 10, 32)
 
-	file, err := h.dataFileService.GetFile(uint(fileID), userID)
+	file, err := h.dataFileService.GetFileMeta(uint(fileID), userID)
 	if err != nil {
 		utils.NotFound(c, "文件不存在")
 		return
@@ -302,7 +302,7 @@ func (h *DataFileHandler) BatchDownloadFiles(c *gin.Context) {
 	// 简化实现:返回文件列表
 	var files []gin.H
 	for _, id := range req.IDs {
-		file, err := h.dataFileService.GetFile(id, userID)
+		file, err := h.dataFileService.GetFileMeta(id, userID)
 		if err == nil {
 			files = append(files, gin.H{
 				"id":           file.ID,
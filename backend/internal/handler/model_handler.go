@@ -104,6 +104,12 @@ func (h *ModelHandler) ModelCall(c *gin.Context) {
 		return
 	}
 
+	// 流式调用：以SSE透传上游增量内容
+	if req.Stream {
+		h.modelCallStream(c, &req)
+		return
+	}
+
 	// 调用模型服务
 	resp, err := h.modelService.CallModel(&req)
 	if err != nil {
@@ -114,3 +120,27 @@ func (h *ModelHandler) ModelCall(c *gin.Context) {
 	// 返回响应
 	c.JSON(200, resp)
 }
+
+// modelCallStream 流式模型调用代理
+// 每段增量内容发送一帧 {"delta": "..."}，最后发送一帧 {"done": true, ...} 汇总结果
+func (h *ModelHandler) modelCallStream(c *gin.Context, req *dto.ModelCallProxyRequest) {
+	utils.SSEHeaders(c)
+
+	ctx := c.Request.Context()
+	resp := h.modelService.CallModelStream(ctx, req, func(delta string) error {
+		if err := utils.SSEData(c.Writer, gin.H{"delta": delta}); err != nil {
+			return err
+		}
+		c.Writer.Flush()
+		return ctx.Err()
+	})
+
+	utils.SSEData(c.Writer, gin.H{
+		"done":         true,
+		"success":      resp.Success,
+		"error":        resp.Error,
+		"input_chars":  resp.InputChars,
+		"output_chars": resp.OutputChars,
+	})
+	c.Writer.Flush()
+}
@@ -1,14 +1,20 @@
 package handler
 
 import (
-	"gen-go/internal/dto"
+	"encoding/json"
+	"log"
+
 	"gen-go/internal/middleware"
+	"gen-go/internal/models"
 	"gen-go/internal/repository"
 	"gen-go/internal/utils"
 
 	"github.com/gin-gonic/gin"
 )
 
+// reportDataLimit 单个报告最多返回的数据条数
+const reportDataLimit = 10000
+
 // ReportHandler 报告处理器
 type ReportHandler struct {
 	generatedDataRepo *repository.GeneratedDataRepository
@@ -79,38 +85,38 @@ func (h *ReportHandler) ListReports(c *gin.Context) {
 func (h *ReportHandler) GetReportData(c *gin.Context) {
 	taskID := c.Param("task_id")
 
-	offset := 0
-	limit := 10000
-	dataList, total, err := h.generatedDataRepo.ListByTaskID(taskID, offset, limit)
+	total, err := h.generatedDataRepo.CountByTaskID(taskID)
 	if err != nil {
 		utils.InternalError(c, err.Error())
 		return
 	}
 
-	// 转换为map格式
-	data := make([]map[string]interface{}, len(dataList))
-	for i, item := range dataList {
-		data[i] = map[string]interface{}{
-			"id":               item.ID,
-			"task_id":          item.TaskID,
-			"user_id":          item.UserID,
-			"data_content":     item.DataContent,
-			"model_score":      item.ModelScore,
-			"rule_score":       item.RuleScore,
-			"retry_count":      item.RetryCount,
-			"generation_model": item.GenerationModel,
-			"task_type":        item.TaskType,
-			"is_confirmed":     item.IsConfirmed,
-			"created_at":       item.CreatedAt,
-			"updated_at":       item.UpdatedAt,
-		}
+	// 流式输出，逐行从数据库读取并编码，避免大任务一次性占用大量内存
+	fields := map[string]interface{}{
+		"task_id": taskID,
+		"total":   int(total),
 	}
-
-	utils.SuccessResponse(c, dto.ReportDataResponse{
-		TaskID: taskID,
-		Data:   data,
-		Total: int(total),
+	err = utils.StreamSuccessList(c, fields, "data", func(emit func(item interface{}) error) error {
+		return h.generatedDataRepo.IterateByTaskID(taskID, reportDataLimit, func(item *models.GeneratedData) error {
+			return emit(map[string]interface{}{
+				"id":               item.ID,
+				"task_id":          item.TaskID,
+				"user_id":          item.UserID,
+				"data_content":     item.DataContent,
+				"model_score":      item.ModelScore,
+				"rule_score":       item.RuleScore,
+				"retry_count":      item.RetryCount,
+				"generation_model": item.GenerationModel,
+				"task_type":        item.TaskType,
+				"is_confirmed":     item.IsConfirmed,
+				"created_at":       item.CreatedAt,
+				"updated_at":       item.UpdatedAt,
+			})
+		})
 	})
+	if err != nil {
+		log.Printf("[GetReportData] 流式输出报告数据失败: %v", err)
+	}
 }
 
 // DeleteReport 删除报告
@@ -136,37 +142,36 @@ func (h *ReportHandler) DeleteReport(c *gin.Context) {
 func (h *ReportHandler) GetReportDataEditable(c *gin.Context) {
 	taskID := c.Param("task_id")
 
-	offset := 0
-	limit := 10000
-	dataList, total, err := h.generatedDataRepo.ListByTaskID(taskID, offset, limit)
+	total, err := h.generatedDataRepo.CountByTaskID(taskID)
 	if err != nil {
 		utils.InternalError(c, err.Error())
 		return
 	}
 
-	// 转换为可编辑格式（包含解析后的 data 对象）
-	data := make([]map[string]interface{}, len(dataList))
-	for i, item := range dataList {
-		// 解析 JSON data_content
-		var dataContent interface{}
-		if err := utils.ParseJSONString(item.DataContent, &dataContent); err != nil {
-			dataContent = map[string]interface{}{}
-		}
-
-		data[i] = map[string]interface{}{
-			"id":           item.ID,
-			"data":         dataContent,
-			"is_confirmed": item.IsConfirmed,
-			"created_at":   item.CreatedAt,
-			"updated_at":   item.UpdatedAt,
-		}
-	}
-
-	utils.SuccessResponse(c, gin.H{
-		"data":   data,
-		"count":  int(total),
+	fields := map[string]interface{}{
+		"count":   int(total),
 		"success": true,
+	}
+	err = utils.StreamSuccessList(c, fields, "data", func(emit func(item interface{}) error) error {
+		return h.generatedDataRepo.IterateByTaskID(taskID, reportDataLimit, func(item *models.GeneratedData) error {
+			// data_content 本身就是JSON，合法时原样输出，无需解析后再编码
+			var dataContent interface{} = map[string]interface{}{}
+			if json.Valid([]byte(item.DataContent)) {
+				dataContent = json.RawMessage(item.DataContent)
+			}
+
+			return emit(map[string]interface{}{
+				"id":           item.ID,
+				"data":         dataContent,
+				"is_confirmed": item.IsConfirmed,
+				"created_at":   item.CreatedAt,
+				"updated_at":   item.UpdatedAt,
+			})
+		})
 	})
+	if err != nil {
+		log.Printf("[GetReportDataEditable] 流式输出报告数据失败: %v", err)
+	}
 }
 
 // BatchDeleteReports 批量删除报告
@@ -4,7 +4,10 @@ import (
 	"context"
 	"encoding/json"
 	"fmt"
+	"hash/fnv"
 	"log"
+	"math"
+	"math/rand"
 	"strconv"
 	"time"
 
@@ -17,6 +20,18 @@ import (
 	"github.com/go-redis/redis/v8"
 )
 
+// sseHeartbeatInterval SSE空闲心跳间隔
+const sseHeartbeatInterval = 15 * time.Second
+
+// maxProgressBatchSize 批量进度查询单次最多任务数
+const maxProgressBatchSize = 100
+
+// 进度轮询退避间隔范围
+const (
+	progressPollMinInterval = 250 * time.Millisecond
+	progressPollMaxInterval = 16 * time.Second
+)
+
 // TaskHandler 任务处理器
 type TaskHandler struct {
 	taskManager *service.TaskManager
@@ -85,10 +100,7 @@ func (h *TaskHandler) GetProgress(c *gin.Context) {
 	defer unsubscribe() // 确保断开连接时取消订阅
 
 	// 设置SSE响应头
-	c.Header("Content-Type", "text/event-stream")
-	c.Header("Cache-Control", "no-cache")
-	c.Header("Connection", "keep-alive")
-	c.Header("X-Accel-Buffering", "no")
+	utils.SSEHeaders(c)
 	c.Header("Access-Control-Allow-Origin", "*")
 
 	// 发送初始连接成功事件
@@ -97,20 +109,18 @@ func (h *TaskHandler) GetProgress(c *gin.Context) {
 		"message": "SSE连接已建立",
 		"task_id": taskID,
 	}
-	initData, _ := json.Marshal(initEvent)
-	fmt.Fprintf(c.Writer, "data: %s\n\n", string(initData))
+	utils.SSEData(c.Writer, initEvent)
 	c.Writer.Flush()
 
 	// 先发送历史事件
 	finishedInHistory := false
 	for _, event := range history {
-		data, _ := json.Marshal(event)
-		fmt.Fprintf(c.Writer, "data: %s\n\n", string(data))
-		c.Writer.Flush()
+		utils.SSEData(c.Writer, event)
 		if event.Type == "finished" {
 			finishedInHistory = true
 		}
 	}
+	c.Writer.Flush()
 
 	// 如果历史事件中已经包含 finished，直接返回
 	if finishedInHistory {
@@ -121,8 +131,15 @@ func (h *TaskHandler) GetProgress(c *gin.Context) {
 	// 使用 context 来处理客户端断开连接
 	ctx := c.Request.Context()
 
+	// 空闲时定期发送心跳注释，仅用于保活连接，不会唤醒前端的事件处理
+	heartbeat := time.NewTicker(sseHeartbeatInterval)
+	defer heartbeat.Stop()
+
 	for {
 		select {
+		case <-heartbeat.C:
+			fmt.Fprint(c.Writer, ": keepalive\n\n")
+			c.Writer.Flush()
 		case <-ctx.Done():
 			// 客户端断开连接
 			log.Printf("[GetProgress] 客户端断开连接: %s", taskID)
@@ -133,9 +150,12 @@ func (h *TaskHandler) GetProgress(c *gin.Context) {
 				log.Printf("[GetProgress] 进度通道已关闭: %s", taskID)
 				return
 			}
-			data, _ := json.Marshal(event)
-			fmt.Fprintf(c.Writer, "data: %s\n\n", string(data))
+			if err := utils.SSEData(c.Writer, event); err != nil {
+				log.Printf("[GetProgress] 写入事件失败: %v", err)
+				return
+			}
 			c.Writer.Flush()
+			heartbeat.Reset(sseHeartbeatInterval)
 
 			if event.Type == "finished" {
 				return
@@ -181,22 +201,12 @@ func (h *TaskHandler) DeleteTask(c *gin.Context) {
 func (h *TaskHandler) GetTaskStatus(c *gin.Context) {
 	taskID := c.Param("task_id")
 
-	taskCtx, exists := h.taskManager.GetTask(taskID)
-	if !exists {
-		utils.NotFound(c, "任务不存在")
+	resp, err := h.taskManager.GetTaskStatus(taskID)
+	if err != nil {
+		utils.NotFound(c, err.Error())
 		return
 	}
 
-	resp := dto.TaskStatusResponse{
-		TaskID:   taskID,
-		Status:   taskCtx.Status,
-		Finished: taskCtx.Finished,
-	}
-
-	if taskCtx.ReturnCode != nil {
-		resp.ReturnCode = taskCtx.ReturnCode
-	}
-
 	utils.SuccessResponse(c, resp)
 }
 
@@ -206,23 +216,25 @@ func (h *TaskHandler) GetAllTasks(c *gin.Context) {
 
 	taskList := make([]dto.TaskInfo, 0, len(tasks))
 	for _, task := range tasks {
+		state := task.State()
 		runTime := float64(0)
-		if task.EndTime != nil && !task.EndTime.IsZero() {
-			runTime = task.EndTime.Sub(task.StartTime).Seconds()
+		if state.EndTime != nil && !state.EndTime.IsZero() {
+			runTime = state.EndTime.Sub(task.StartTime).Seconds()
 		} else {
 			runTime = time.Since(task.StartTime).Seconds()
 		}
 
 		info := dto.TaskInfo{
-			TaskID:   task.TaskID,
-			Status:   task.Status,
-			Params:   task.Params,
-			RunTime:  runTime,
-			Finished: task.Finished,
+			TaskID:    task.TaskID,
+			Status:    state.Status,
+			Params:    task.Params,
+			RunTime:   runTime,
+			StartTime: task.StartTime,
+			Finished:  state.Finished,
 		}
 
-		if task.ReturnCode != nil {
-			info.ReturnCode = task.ReturnCode
+		if state.ReturnCode != nil {
+			info.ReturnCode = state.ReturnCode
 		}
 
 		taskList = append(taskList, info)
@@ -239,7 +251,7 @@ func (h *TaskHandler) GetActiveTask(c *gin.Context) {
 	tasks := h.taskManager.GetAllTasks()
 
 	for _, task := range tasks {
-		if !task.Finished {
+		if !task.State().Finished {
 			runTime := time.Since(task.StartTime).Seconds()
 			utils.SuccessResponse(c, gin.H{
 				"success":  true,
@@ -271,51 +283,9 @@ func (h *TaskHandler) GetProgressUnified(c *gin.Context) {
 
 	if hashErr == nil && len(hashData) > 0 {
 		// Hash数据存在，使用Hash数据
-		progressData := make(map[string]interface{})
-
-		// 转换所有字段
-		for key, val := range hashData {
-			// 尝试解析为JSON值
-			var jsonVal interface{}
-			if err := json.Unmarshal([]byte(val), &jsonVal); err == nil {
-				progressData[key] = jsonVal
-			} else {
-				// 如果不是JSON，尝试解析为数字
-				if intVal, err := strconv.ParseInt(val, 10, 64); err == nil {
-					progressData[key] = intVal
-				} else {
-					// 否则作为字符串
-					progressData[key] = val
-				}
-			}
-		}
-
-		// 确保有task_id字段
-		if _, ok := progressData["task_id"]; !ok {
-			progressData["task_id"] = taskID
-		}
-
-		// 计算进度百分比
-		progressPercent := 0.0
-		if cp, ok := progressData["completion_percent"].(float64); ok {
-			progressPercent = cp
-		} else {
-			// 回退：使用轮次计算进度
-			if totalRounds, ok := progressData["total_rounds"].(float64); ok && totalRounds > 0 {
-				if currentRound, ok := progressData["current_round"].(float64); ok {
-					progressPercent = (currentRound / totalRounds) * 100
-				}
-			}
-		}
-
-		// 确保进度不超过100%
-		if progressPercent > 100 {
-			progressPercent = 100
-		}
-
-		// 添加进度百分比到响应
-		progressData["progress_percent"] = progressPercent
-		progressData["source"] = "redis"
+		progressData := parseProgressHash(taskID, hashData)
+		fillProgressPercent(progressData)
+		setProgressRetryHint(c, progressData)
 
 		utils.SuccessResponse(c, gin.H{
 			"success":  true,
@@ -329,39 +299,11 @@ func (h *TaskHandler) GetProgressUnified(c *gin.Context) {
 	if err != nil {
 		if err == redis.Nil {
 			// Redis中没有进度数据，检查任务是否在内存中
-			taskCtx, exists := h.taskManager.GetTask(taskID)
-			if exists {
-				// 任务在内存中，返回基本信息
-				runTime := time.Since(taskCtx.StartTime).Seconds()
-				// 确定status字段：将Go的状态转换为前端期望的格式
-				status := "running"
-				if taskCtx.Finished {
-					if taskCtx.ReturnCode != nil && *taskCtx.ReturnCode == 0 {
-						status = "completed"
-					} else {
-						status = "failed"
-					}
-				}
-
-				// 从params中获取total_rounds
-				totalRounds := int64(3)
-				if tr, ok := taskCtx.Params["total_rounds"].(float64); ok {
-					totalRounds = int64(tr)
-				}
-
+			if progress, exists := h.memoryProgress(taskID); exists {
+				setProgressRetryHint(c, progress)
 				utils.SuccessResponse(c, gin.H{
-					"success": true,
-					"progress": gin.H{
-						"task_id":          taskID,
-						"status":           status,
-						"current_round":    0,
-						"total_rounds":     totalRounds,
-						"total_samples":    0,
-						"generated_count":  0,
-						"progress_percent": float64(0),
-						"run_time":         runTime,
-						"source":           "memory",
-					},
+					"success":  true,
+					"progress": progress,
 				})
 				return
 			}
@@ -381,8 +323,222 @@ func (h *TaskHandler) GetProgressUnified(c *gin.Context) {
 		utils.InternalError(c, "解析进度数据失败")
 		return
 	}
+	fillProgressPercent(progressData)
+	setProgressRetryHint(c, progressData)
+
+	utils.SuccessResponse(c, gin.H{
+		"success":  true,
+		"progress": progressData,
+	})
+}
+
+// GetProgressUnifiedBatch 批量获取任务进度（从Redis）
+// 所有任务的进度通过一次流水线往返读取，避免看板按任务逐个轮询
+func (h *TaskHandler) GetProgressUnifiedBatch(c *gin.Context) {
+	var req struct {
+		TaskIDs []string `json:"task_ids" binding:"required"`
+	}
+	if err := c.ShouldBindJSON(&req); err != nil {
+		utils.BadRequest(c, err.Error())
+		return
+	}
+	if len(req.TaskIDs) > maxProgressBatchSize {
+		utils.BadRequest(c, fmt.Sprintf("单次最多查询 %d 个任务", maxProgressBatchSize))
+		return
+	}
 
-	// 计算进度百分比
+	ctx := context.Background()
+	pipe := h.redisClient.Pipeline()
+	cmds := make([]*redis.StringStringMapCmd, len(req.TaskIDs))
+	for i, taskID := range req.TaskIDs {
+		cmds[i] = pipe.HGetAll(ctx, "task_progress:"+taskID)
+	}
+	// 单条命令失败（如旧版字符串格式的key）不影响其他任务，逐条检查结果
+	if _, err := pipe.Exec(ctx); err != nil {
+		log.Printf("[GetProgressUnifiedBatch] Redis流水线部分失败: %v", err)
+	}
+
+	progress := make(map[string]interface{}, len(req.TaskIDs))
+	for i, taskID := range req.TaskIDs {
+		if hashData, err := cmds[i].Result(); err == nil && len(hashData) > 0 {
+			progressData := parseProgressHash(taskID, hashData)
+			fillProgressPercent(progressData)
+			progress[taskID] = progressData
+			continue
+		}
+		// Redis中没有进度数据，回退到内存中的任务信息
+		if memProgress, exists := h.memoryProgress(taskID); exists {
+			progress[taskID] = memProgress
+		}
+	}
+
+	utils.SuccessResponse(c, gin.H{
+		"success":  true,
+		"progress": progress,
+	})
+}
+
+// GetProgressStream 订阅任务进度（SSE，基于Redis发布订阅）
+// Python 每次更新进度时会发布到 task_progress_events:{task_id}，这里只在进度变化时推送，替代前端轮询
+func (h *TaskHandler) GetProgressStream(c *gin.Context) {
+	taskID := c.Param("task_id")
+	ctx := c.Request.Context()
+
+	// 先订阅再读取快照，避免两者之间的更新丢失
+	pubsub := h.redisClient.Subscribe(ctx, "task_progress_events:"+taskID)
+	defer pubsub.Close()
+	if _, err := pubsub.Receive(ctx); err != nil {
+		log.Printf("[GetProgressStream] 订阅进度频道失败: %v", err)
+		utils.InternalError(c, "订阅进度失败")
+		return
+	}
+
+	// 当前进度快照，后续的增量更新合并到其中
+	progressData := map[string]interface{}{"task_id": taskID}
+	if hashData, err := h.redisClient.HGetAll(ctx, "task_progress:"+taskID).Result(); err == nil && len(hashData) > 0 {
+		progressData = parseProgressHash(taskID, hashData)
+	} else if memProgress, exists := h.memoryProgress(taskID); exists {
+		progressData = memProgress
+	} else {
+		utils.NotFound(c, "任务不存在")
+		return
+	}
+
+	utils.SSEHeaders(c)
+
+	emit := func() bool {
+		fillProgressPercent(progressData)
+		utils.SSEData(c.Writer, gin.H{
+			"type":     "progress",
+			"progress": progressData,
+		})
+		c.Writer.Flush()
+		status, _ := progressData["status"].(string)
+		return status == "completed" || status == "failed"
+	}
+	if emit() {
+		return
+	}
+
+	heartbeat := time.NewTicker(sseHeartbeatInterval)
+	defer heartbeat.Stop()
+	messages := pubsub.Channel()
+
+	for {
+		select {
+		case <-ctx.Done():
+			return
+		case <-heartbeat.C:
+			// Python 只发布运行中和完成时的进度，任务失败、被停止或进程崩溃时不会发布最终状态，
+			// 因此每次心跳检查任务是否已结束，结束则推送最终状态并关闭连接
+			if status, finished := h.finishedStatus(taskID); finished {
+				progressData["status"] = status
+				emit()
+				return
+			}
+			fmt.Fprint(c.Writer, ": keepalive\n\n")
+			c.Writer.Flush()
+		case msg, ok := <-messages:
+			if !ok {
+				return
+			}
+			var update map[string]interface{}
+			if err := json.Unmarshal([]byte(msg.Payload), &update); err != nil {
+				log.Printf("[GetProgressStream] 解析进度消息失败: %v", err)
+				continue
+			}
+			for key, val := range update {
+				progressData[key] = val
+			}
+			progressData["source"] = "redis"
+			heartbeat.Reset(sseHeartbeatInterval)
+			if emit() {
+				return
+			}
+		}
+	}
+}
+
+// finishedStatus 任务已结束时返回前端期望的最终状态（completed/failed）
+// 内存中的任务已被清理或后端重启过时以数据库记录为准，任务记录已不存在时视为失败
+func (h *TaskHandler) finishedStatus(taskID string) (string, bool) {
+	resp, err := h.taskManager.GetTaskStatus(taskID)
+	if err != nil {
+		return "failed", true
+	}
+	if !resp.Finished {
+		return "", false
+	}
+	if resp.ReturnCode != nil && *resp.ReturnCode == 0 {
+		return "completed", true
+	}
+	return "failed", true
+}
+
+// setProgressRetryHint 计算建议的下次轮询间隔并写入响应（progress.version / progress.retry_after_ms 与 Retry-After 头）
+// 客户端通过 since（上次的 version）和 interval_ms（上次的间隔）回传状态：
+// 进度未变化时间隔翻倍（250ms 起，最长16s），变化后重置为250ms，并叠加最多20%的随机抖动
+func setProgressRetryHint(c *gin.Context, progressData map[string]interface{}) {
+	// 运行时长每次都会变化，不参与版本计算
+	runTime, hasRunTime := progressData["run_time"]
+	delete(progressData, "run_time")
+	encoded, _ := json.Marshal(progressData)
+	if hasRunTime {
+		progressData["run_time"] = runTime
+	}
+	hasher := fnv.New64a()
+	hasher.Write(encoded)
+	version := strconv.FormatUint(hasher.Sum64(), 16)
+
+	interval := progressPollMinInterval
+	if c.Query("since") == version {
+		if prev, err := strconv.ParseInt(c.Query("interval_ms"), 10, 64); err == nil {
+			interval = time.Duration(prev) * time.Millisecond * 2
+		}
+		if interval < progressPollMinInterval {
+			interval = progressPollMinInterval
+		}
+		if interval > progressPollMaxInterval {
+			interval = progressPollMaxInterval
+		}
+	}
+	interval += time.Duration(rand.Int63n(int64(interval)/5 + 1))
+
+	progressData["version"] = version
+	progressData["retry_after_ms"] = interval.Milliseconds()
+	c.Header("Retry-After", strconv.FormatInt(int64(math.Ceil(interval.Seconds())), 10))
+}
+
+// parseProgressHash 将Redis Hash中的进度字段转换为响应数据
+func parseProgressHash(taskID string, hashData map[string]string) map[string]interface{} {
+	progressData := make(map[string]interface{}, len(hashData)+2)
+
+	// 转换所有字段
+	for key, val := range hashData {
+		// 尝试解析为JSON值
+		var jsonVal interface{}
+		if err := json.Unmarshal([]byte(val), &jsonVal); err == nil {
+			progressData[key] = jsonVal
+		} else {
+			// 如果不是JSON，尝试解析为数字
+			if intVal, err := strconv.ParseInt(val, 10, 64); err == nil {
+				progressData[key] = intVal
+			} else {
+				// 否则作为字符串
+				progressData[key] = val
+			}
+		}
+	}
+
+	// 确保有task_id字段
+	if _, ok := progressData["task_id"]; !ok {
+		progressData["task_id"] = taskID
+	}
+	return progressData
+}
+
+// fillProgressPercent 计算进度百分比并写入 progress_percent，未标明来源时将 source 设为 redis
+func fillProgressPercent(progressData map[string]interface{}) {
 	// 优先使用 Python 计算的 completion_percent 字段（基于轮次完成比例，更准确）
 	progressPercent := 0.0
 	if cp, ok := progressData["completion_percent"].(float64); ok {
@@ -403,10 +559,46 @@ func (h *TaskHandler) GetProgressUnified(c *gin.Context) {
 
 	// 添加进度百分比到响应
 	progressData["progress_percent"] = progressPercent
-	progressData["source"] = "redis"
+	// 来自内存快照的数据已带 source=memory，不覆盖
+	if _, ok := progressData["source"]; !ok {
+		progressData["source"] = "redis"
+	}
+}
 
-	utils.SuccessResponse(c, gin.H{
-		"success":  true,
-		"progress": progressData,
-	})
+// memoryProgress 从内存中的任务上下文构建基本进度信息
+func (h *TaskHandler) memoryProgress(taskID string) (gin.H, bool) {
+	taskCtx, exists := h.taskManager.GetTask(taskID)
+	if !exists {
+		return nil, false
+	}
+
+	// 任务在内存中，返回基本信息
+	runTime := time.Since(taskCtx.StartTime).Seconds()
+	// 确定status字段：将Go的状态转换为前端期望的格式
+	status := "running"
+	if state := taskCtx.State(); state.Finished {
+		if state.ReturnCode != nil && *state.ReturnCode == 0 {
+			status = "completed"
+		} else {
+			status = "failed"
+		}
+	}
+
+	// 从params中获取total_rounds
+	totalRounds := int64(3)
+	if tr, ok := taskCtx.Params["total_rounds"].(float64); ok {
+		totalRounds = int64(tr)
+	}
+
+	return gin.H{
+		"task_id":          taskID,
+		"status":           status,
+		"current_round":    0,
+		"total_rounds":     totalRounds,
+		"total_samples":    0,
+		"generated_count":  0,
+		"progress_percent": float64(0),
+		"run_time":         runTime,
+		"source":           "memory",
+	}, true
 }
@@ -7,11 +7,11 @@ import (
 // DataFile 数据文件模型
 type DataFile struct {
 	ID          uint      `gorm:"primarykey" json:"id"`
-	Filename    string    `gorm:"size:255;not null" json:"filename"`
+	Filename    string    `gorm:"size:255;not null;index:idx_data_files_user_filename,priority:2" json:"filename"`
 	FileContent []byte    `gorm:"type:blob;not null" json:"-"`
 	FileSize    int       `gorm:"not null" json:"file_size"`
 	ContentType string    `gorm:"size:100;default:'application/x-jsonlines'" json:"content_type"`
-	UserID      uint      `gorm:"not null;index" json:"user_id"`
+	UserID      uint      `gorm:"not null;index;index:idx_data_files_user_filename,priority:1" json:"user_id"`
 	CreatedAt   time.Time `json:"created_at"`
 	UpdatedAt   time.Time `json:"updated_at"`
 
@@ -7,16 +7,16 @@ import (
 // GeneratedData 生成数据模型
 type GeneratedData struct {
 	ID              uint      `gorm:"primarykey" json:"id"`
-	TaskID          string    `gorm:"size:100;not null;index" json:"task_id"`
-	UserID          uint      `gorm:"not null;index" json:"user_id"`
+	TaskID          string    `gorm:"size:100;not null;index;index:idx_generated_data_task_user_confirmed,priority:1;index:idx_generated_data_task_created,priority:1" json:"task_id"`
+	UserID          uint      `gorm:"not null;index;index:idx_generated_data_task_user_confirmed,priority:2;index:idx_generated_data_user_created,priority:1" json:"user_id"`
 	DataContent     string    `gorm:"type:text;not null" json:"data_content"`
 	ModelScore      *float64  `json:"model_score"`
 	RuleScore       *int      `json:"rule_score"`
 	RetryCount      int       `gorm:"default:0" json:"retry_count"`
 	GenerationModel string    `gorm:"size:255" json:"generation_model"`
 	TaskType        string    `gorm:"size:50" json:"task_type"`
-	IsConfirmed     bool      `gorm:"default:false" json:"is_confirmed"`
-	CreatedAt       time.Time `json:"created_at"`
+	IsConfirmed     bool      `gorm:"default:false;index:idx_generated_data_task_user_confirmed,priority:3" json:"is_confirmed"`
+	CreatedAt       time.Time `gorm:"index:idx_generated_data_task_created,priority:2;index:idx_generated_data_user_created,priority:2" json:"created_at"`
 	UpdatedAt       time.Time `json:"updated_at"`
 
 	// 关联
@@ -19,6 +19,7 @@ func InitDB(cfg *config.Config) error {
 	DB, err = gorm.Open(sqlite.Open(cfg.Database.Path), &gorm.Config{
 		Logger:                                   logger.Default.LogMode(logger.Silent), // 使用静默模式
 		DisableForeignKeyConstraintWhenMigrating: true,
+		PrepareStmt:                              true, // 缓存预编译语句，热点查询无需每次重新编译SQL
 	})
 	if err != nil {
 		return err
@@ -10,7 +10,7 @@ type User struct {
 	Username     string    `gorm:"uniqueIndex;size:50;not null" json:"username"`
 	PasswordHash string    `gorm:"size:255;not null" json:"-"`
 	IsActive     bool      `gorm:"default:true" json:"is_active"`
-	IsAdmin      bool      `gorm:"default:false" json:"is_admin"`
+	IsAdmin      bool      `gorm:"default:false;index:idx_users_admin,where:is_admin = 1" json:"is_admin"`
 	CreatedAt    time.Time `json:"created_at"`
 	UpdatedAt    time.Time `json:"updated_at"`
 
@@ -41,6 +41,16 @@ func (r *DataFileRepository) GetByIDAndUserID(id uint, userID uint) (*models.Dat
 	return &file, nil
 }
 
+// GetMetaByIDAndUserID 根据ID和用户ID获取文件元信息（不加载file_content大字段）
+func (r *DataFileRepository) GetMetaByIDAndUserID(id uint, userID uint) (*models.DataFile, error) {
+	var file models.DataFile
+	err := r.db.Omit("file_content").Where("id = ? AND user_id = ?", id, userID).First(&file).Error
+	if err != nil {
+		return nil, err
+	}
+	return &file, nil
+}
+
 // Update 更新文件
 func (r *DataFileRepository) Update(file *models.DataFile) error {
 	return r.db.Save(file).Error
@@ -65,7 +75,8 @@ func (r *DataFileRepository) List(offset, limit int) ([]models.DataFile, int64,
 		return nil, 0, err
 	}
 
-	err := r.db.Preload("User").Order("created_at DESC").Offset(offset).Limit(limit).Find(&files).Error
+	// 列表只展示元信息，不读取file_content大字段
+	err := r.db.Omit("file_content").Preload("User").Order("created_at DESC").Offset(offset).Limit(limit).Find(&files).Error
 	return files, total, err
 }
 
@@ -79,7 +90,8 @@ func (r *DataFileRepository) ListByUserID(userID uint, offset, limit int) ([]mod
 		return nil, 0, err
 	}
 
-	err := query.Order("created_at DESC").Offset(offset).Limit(limit).Find(&files).Error
+	// 列表只展示元信息，不读取file_content大字段
+	err := query.Omit("file_content").Order("created_at DESC").Offset(offset).Limit(limit).Find(&files).Error
 	return files, total, err
 }
 
@@ -112,6 +112,33 @@ func (r *GeneratedDataRepository) ListByTaskID(taskID string, offset, limit int)
 	return dataList, total, err
 }
 
+// CountByTaskID 获取任务的数据总数
+func (r *GeneratedDataRepository) CountByTaskID(taskID string) (int64, error) {
+	var count int64
+	err := r.db.Model(&models.GeneratedData{}).Where("task_id = ?", taskID).Count(&count).Error
+	return count, err
+}
+
+// IterateByTaskID 逐行遍历任务的数据（按创建时间倒序），避免一次性加载整个列表到内存
+func (r *GeneratedDataRepository) IterateByTaskID(taskID string, limit int, fn func(item *models.GeneratedData) error) error {
+	rows, err := r.db.Model(&models.GeneratedData{}).Where("task_id = ?", taskID).Order("created_at DESC").Limit(limit).Rows()
+	if err != nil {
+		return err
+	}
+	defer rows.Close()
+
+	for rows.Next() {
+		var item models.GeneratedData
+		if err := r.db.ScanRows(rows, &item); err != nil {
+			return err
+		}
+		if err := fn(&item); err != nil {
+			return err
+		}
+	}
+	return rows.Err()
+}
+
 // ListByIDs 根据ID列表获取数据
 func (r *GeneratedDataRepository) ListByIDs(ids []uint) ([]models.GeneratedData, error) {
 	var dataList []models.GeneratedData
@@ -133,6 +133,14 @@ func (r *TaskRepository) ExistsByTaskID(taskID string) (bool, error) {
 	return count > 0, err
 }
 
+// ListTaskIDsByPrefix 获取所有以指定前缀开头的任务ID
+// LIKE 中的 _ 和 % 可能多匹配一些记录，调用方需按精确值判断
+func (r *TaskRepository) ListTaskIDsByPrefix(prefix string) ([]string, error) {
+	var taskIDs []string
+	err := r.db.Model(&models.Task{}).Where("task_id LIKE ?", prefix+"%").Pluck("task_id", &taskIDs).Error
+	return taskIDs, err
+}
+
 // UpdateInputOutputChars 更新任务的输入输出字符数
 func (r *TaskRepository) UpdateInputOutputChars(taskID string, inputChars, outputChars int64) error {
 	return r.db.Model(&models.Task{}).Where("task_id = ?", taskID).Updates(map[string]interface{}{
@@ -143,8 +151,33 @@ func (r *TaskRepository) UpdateInputOutputChars(taskID string, inputChars, outpu
 
 // UpdateStatusWithTimeAndChars 更新任务状态、完成时间和字符数
 func (r *TaskRepository) UpdateStatusWithTimeAndChars(taskID string, status string, inputChars, outputChars int64) error {
+	return r.db.Model(&models.Task{}).Where("task_id = ?", taskID).Updates(statusUpdateFields(status, inputChars, outputChars)).Error
+}
+
+// TaskStatusUpdate 一条任务状态更新
+type TaskStatusUpdate struct {
+	TaskID      string
+	Status      string
+	InputChars  int64
+	OutputChars int64
+}
+
+// BatchUpdateStatusWithTimeAndChars 在同一个事务中批量更新任务状态、完成时间和字符数（只提交一次）
+func (r *TaskRepository) BatchUpdateStatusWithTimeAndChars(updates []TaskStatusUpdate) error {
+	return r.db.Transaction(func(tx *gorm.DB) error {
+		for _, u := range updates {
+			if err := tx.Model(&models.Task{}).Where("task_id = ?", u.TaskID).Updates(statusUpdateFields(u.Status, u.InputChars, u.OutputChars)).Error; err != nil {
+				return err
+			}
+		}
+		return nil
+	})
+}
+
+// statusUpdateFields 构造状态更新字段，结束状态同时写入完成时间
+func statusUpdateFields(status string, inputChars, outputChars int64) map[string]interface{} {
 	updates := map[string]interface{}{
-		"status":      status,
+		"status":       status,
 		"input_chars":  inputChars,
 		"output_chars": outputChars,
 	}
@@ -153,5 +186,5 @@ func (r *TaskRepository) UpdateStatusWithTimeAndChars(taskID string, status stri
 		updates["finished_at"] = time.Now()
 	}
 
-	return r.db.Model(&models.Task{}).Where("task_id = ?", taskID).Updates(updates).Error
+	return updates
 }
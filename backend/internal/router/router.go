@@ -92,6 +92,8 @@ func SetupRouter(
 			authorized.POST("/start", taskHandler.StartTask)
 			authorized.GET("/progress/:task_id", taskHandler.GetProgress)
 			authorized.GET("/progress_unified/:task_id", taskHandler.GetProgressUnified)
+			authorized.POST("/progress_unified_batch", taskHandler.GetProgressUnifiedBatch)
+			authorized.GET("/progress_stream/:task_id", taskHandler.GetProgressStream)
 			authorized.POST("/stop/:task_id", taskHandler.StopTask)
 			authorized.DELETE("/task/:task_id", taskHandler.DeleteTask)
 			authorized.GET("/status/:task_id", taskHandler.GetTaskStatus)
@@ -64,6 +64,11 @@ func (s *DataFileService) GetFile(fileID uint, userID uint) (*models.DataFile, e
 	return s.fileRepo.GetByIDAndUserID(fileID, userID)
 }
 
+// GetFileMeta 获取文件元信息（不含文件内容）
+func (s *DataFileService) GetFileMeta(fileID uint, userID uint) (*models.DataFile, error) {
+	return s.fileRepo.GetMetaByIDAndUserID(fileID, userID)
+}
+
 // ListFiles 获取文件列表
 func (s *DataFileService) ListFiles(userID uint, page, perPage int) (*dto.PaginatedResponse, error) {
 	offset := (page - 1) * perPage
@@ -95,7 +100,7 @@ func (s *DataFileService) ListFiles(userID uint, page, perPage int) (*dto.Pagina
 
 // DeleteFile 删除文件
 func (s *DataFileService) DeleteFile(fileID uint, userID uint) error {
-	file, err := s.fileRepo.GetByIDAndUserID(fileID, userID)
+	file, err := s.fileRepo.GetMetaByIDAndUserID(fileID, userID)
 	if err != nil {
 		return fmt.Errorf("文件不存在或无权访问")
 	}
@@ -106,7 +111,7 @@ func (s *DataFileService) DeleteFile(fileID uint, userID uint) error {
 // BatchDeleteFiles 批量删除文件
 func (s *DataFileService) BatchDeleteFiles(userID uint, ids []uint) error {
 	for _, id := range ids {
-		file, err := s.fileRepo.GetByIDAndUserID(id, userID)
+		file, err := s.fileRepo.GetMetaByIDAndUserID(id, userID)
 		if err != nil {
 			continue // 跳过不存在的文件
 		}
@@ -115,11 +115,7 @@ func (s *GeneratedDataService) ExportData(taskID string, format string) ([]byte,
 
 	if format == "csv" {
 		// 将所有JSONL数据合并为一个字符串，然后使用正确的对话格式转换为CSV
-		var jsonlData []byte
-		for _, data := range dataList {
-			jsonlData = append(jsonlData, []byte(data.DataContent)...)
-			jsonlData = append(jsonlData, '\n')
-		}
+		jsonlData := joinJSONLines(dataList)
 
 		// 使用专门的 JSONL 到 CSV 转换方法（支持 meta、Human、Assistant 格式）
 		csvContent, err := utils.ConvertJSONLToCSV(jsonlData)
@@ -131,13 +127,24 @@ func (s *GeneratedDataService) ExportData(taskID string, format string) ([]byte,
 	}
 
 	// 默认JSONL
-	var result []byte
-	for _, data := range dataList {
-		result = append(result, []byte(data.DataContent)...)
+	filename := taskID + ".jsonl"
+	return joinJSONLines(dataList), filename, nil
+}
+
+// joinJSONLines 将数据内容按行拼接为JSONL
+// 先计算总长度一次性分配缓冲区，并直接追加字符串，避免逐行扩容和 []byte 转换产生的拷贝
+func joinJSONLines(dataList []models.GeneratedData) []byte {
+	size := 0
+	for i := range dataList {
+		size += len(dataList[i].DataContent) + 1
+	}
+
+	result := make([]byte, 0, size)
+	for i := range dataList {
+		result = append(result, dataList[i].DataContent...)
 		result = append(result, '\n')
 	}
-	filename := taskID + ".jsonl"
-	return result, filename, nil
+	return result
 }
 
 // DeleteBatch 批量删除数据
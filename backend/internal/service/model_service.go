@@ -1,15 +1,19 @@
 package service
 
 import (
+	"bufio"
 	"bytes"
 	"context"
 	"encoding/json"
+	"errors"
 	"fmt"
 	"io"
 	"log"
+	"math/rand"
 	"net/http"
 	"sync"
 	"time"
+	"unicode/utf8"
 
 	"gen-go/internal/config"
 	"gen-go/internal/dto"
@@ -28,6 +32,33 @@ type ModelService struct {
 	// 并发限制器映射，每个模型一个限制器
 	concurrencyLimiters map[string]*redis_limiter.RedisLimiter
 	limitersMu          sync.RWMutex
+	// 模型最大并发数缓存，避免每次代理调用都查询数据库
+	concurrencyCache   map[string]concurrencyCacheEntry
+	concurrencyCacheMu sync.RWMutex
+}
+
+// concurrencyCacheEntry 最大并发数缓存项
+type concurrencyCacheEntry struct {
+	maxConcurrent int
+	expiresAt     time.Time
+}
+
+// concurrencyCacheTTL 最大并发数缓存有效期
+const concurrencyCacheTTL = 30 * time.Second
+
+// defaultMaxConcurrent 查询不到模型配置时使用的默认并发数
+const defaultMaxConcurrent = 10
+
+// modelTransport 所有模型调用共享的连接池
+// http.DefaultTransport 每个主机只保留2个空闲连接，高并发访问同一模型服务时连接会被频繁关闭重建
+var modelTransport = newModelTransport()
+
+func newModelTransport() *http.Transport {
+	t := http.DefaultTransport.(*http.Transport).Clone()
+	t.MaxIdleConns = 512
+	t.MaxIdleConnsPerHost = 256
+	t.IdleConnTimeout = 90 * time.Second
+	return t
 }
 
 // NewModelService 创建模型服务
@@ -37,6 +68,7 @@ func NewModelService(modelRepo *repository.ModelConfigRepository, redisClient *r
 		redisClient:         redisClient,
 		cfg:                 cfg,
 		concurrencyLimiters: make(map[string]*redis_limiter.RedisLimiter),
+		concurrencyCache:    make(map[string]concurrencyCacheEntry),
 	}
 	return s
 }
@@ -134,6 +166,7 @@ func (s *ModelService) CreateModel(req *dto.CreateModelConfigRequest) (*models.M
 	if err := s.modelRepo.Create(model); err != nil {
 		return nil, err
 	}
+	s.invalidateConcurrencyCache()
 
 	return model, nil
 }
@@ -182,179 +215,364 @@ func (s *ModelService) UpdateModel(id uint, req *dto.UpdateModelConfigRequest) e
 		model.IsActive = *req.IsActive
 	}
 
-	return s.modelRepo.Update(model)
+	if err := s.modelRepo.Update(model); err != nil {
+		return err
+	}
+	s.invalidateConcurrencyCache()
+	return nil
 }
 
 // DeleteModel 删除模型
 func (s *ModelService) DeleteModel(id uint) error {
-	return s.modelRepo.Delete(id)
+	if err := s.modelRepo.Delete(id); err != nil {
+		return err
+	}
+	s.invalidateConcurrencyCache()
+	return nil
 }
 
 // CallModel 调用模型API（代理模式）
 func (s *ModelService) CallModel(req *dto.ModelCallProxyRequest) (*dto.ModelCallProxyResponse, error) {
-	// 根据模型名称查找模型配置以获取最大并发数
-	modelConfig, err := s.getModelConfigByName(req.Model)
-	if err != nil {
-		log.Printf("[CallModel] 获取模型配置失败: %v", err)
-		// 如果获取失败，使用默认并发数
-		modelConfig = &models.ModelConfig{MaxConcurrent: 10} // 默认值
-	}
+	// 获取模型最大并发数（带缓存）
+	maxConcurrent := s.getMaxConcurrent(req.Model)
 
 	// 获取或创建Redis并发限制器
-	limiter := s.getOrCreateLimiter(req.Model, modelConfig.MaxConcurrent)
+	limiter := s.getOrCreateLimiter(req.Model, maxConcurrent)
 
-	// 获取并发槽位
 	ctx := context.Background()
-	if err := limiter.Acquire(ctx, req.Model); err != nil {
-		log.Printf("[CallModel] 获取并发槽位失败: %v", err)
+
+	// 构建请求体
+	jsonBody, inputChars, err := buildModelRequestBody(req, false)
+	if err != nil {
+		log.Printf("[CallModel] 序列化请求失败: %v", err)
 		return &dto.ModelCallProxyResponse{
 			Success: false,
-			Error:   fmt.Sprintf("获取并发槽位失败: %v", err),
+			Error:   fmt.Sprintf("序列化请求失败: %v", err),
 		}, nil
 	}
-	defer limiter.Release(ctx, req.Model)
 
-	// 构建消息
-	messages := make([]dto.Message, len(req.Messages))
-	for i, msg := range req.Messages {
-		messages[i] = dto.Message{
-			Role:    msg.Role,
-			Content: msg.Content,
+	// 创建HTTP客户端
+	client := &http.Client{
+		Transport: modelTransport,
+		Timeout:   time.Duration(req.Timeout) * time.Second,
+	}
+	url := req.APIUrl + "/chat/completions"
+
+	// 带指数退避+抖动的重试：网络错误与5xx/429重试，其余4xx直接返回
+	maxAttempts := req.RetryTimes
+	if maxAttempts < 1 {
+		maxAttempts = 1
+	}
+	var result *dto.ModelCallResponse
+	var lastErr error
+	for attempt := 0; attempt < maxAttempts; attempt++ {
+		if attempt > 0 {
+			wait := retryBackoff(attempt)
+			log.Printf("[CallModel] 第%d次重试, 等待 %v, 上次错误: %v", attempt, wait, lastErr)
+			time.Sleep(wait)
+		}
+
+		// 仅在实际请求上游期间占用并发槽位，重试等待期间释放，避免失败重试放大槽位占用
+		if err := limiter.Acquire(ctx, req.Model); err != nil {
+			log.Printf("[CallModel] 获取并发槽位失败: %v", err)
+			return &dto.ModelCallProxyResponse{
+				Success: false,
+				Error:   fmt.Sprintf("获取并发槽位失败: %v", err),
+			}, nil
+		}
+		res, retryable, err := s.doModelRequest(ctx, client, url, req.APIKey, jsonBody)
+		limiter.Release(ctx, req.Model)
+
+		if err == nil {
+			result = res
+			break
+		}
+		lastErr = err
+		log.Printf("[CallModel] %v", err)
+		if !retryable {
+			break
 		}
 	}
 
-	// 构建请求体
-	reqBody := map[string]interface{}{
-		"model":    req.Model,
-		"messages": messages,
+	if result == nil {
+		return &dto.ModelCallProxyResponse{
+			Success: false,
+			Error:   lastErr.Error(),
+		}, nil
 	}
 
-	if !req.IsVLLM {
-		// OpenAI格式
-		reqBody["max_tokens"] = req.MaxTokens
-	} else {
-		// vLLM格式
-		reqBody["max_tokens"] = req.MaxTokens
+	// 提取内容
+	if len(result.Choices) == 0 {
+		return &dto.ModelCallProxyResponse{
+			Success: false,
+			Error:   "API返回空响应",
+		}, nil
 	}
 
-	reqBody["temperature"] = req.Temperature
-	reqBody["top_p"] = req.TopP
+	content := result.Choices[0].Message.Content
 
-	// 计算输入字符数（实际字符数，按UTF-8计算）
-	inputChars := 0
-	for _, msg := range req.Messages {
-		inputChars += len([]rune(msg.Content))
-	}
+	// 计算输出字符数（实际字符数，按UTF-8计算）
+	outputChars := utf8.RuneCountInString(content)
 
-	// 转换请求体为JSON
-	jsonBody, err := json.Marshal(reqBody)
+	// 累加任务字符数到Redis
+	s.recordTaskChars(req.TaskID, inputChars, outputChars)
+
+	return &dto.ModelCallProxyResponse{
+		Success:     true,
+		Content:     content,
+		InputChars:  inputChars,
+		OutputChars: outputChars,
+	}, nil
+}
+
+// CallModelStream 流式调用模型API（代理模式），上游SSE的增量内容通过 emit 逐段透传
+// 仅在开始透传内容之前的失败会重试，一旦开始透传则不再重试
+func (s *ModelService) CallModelStream(ctx context.Context, req *dto.ModelCallProxyRequest, emit func(delta string) error) *dto.ModelCallProxyResponse {
+	limiter := s.getOrCreateLimiter(req.Model, s.getMaxConcurrent(req.Model))
+
+	jsonBody, inputChars, err := buildModelRequestBody(req, true)
 	if err != nil {
-		log.Printf("[CallModel] 序列化请求失败: %v", err)
+		log.Printf("[CallModelStream] 序列化请求失败: %v", err)
 		return &dto.ModelCallProxyResponse{
 			Success: false,
 			Error:   fmt.Sprintf("序列化请求失败: %v", err),
-		}, nil
+		}
 	}
 
-	// 构建HTTP请求
+	client := &http.Client{
+		Transport: modelTransport,
+		Timeout:   time.Duration(req.Timeout) * time.Second,
+	}
 	url := req.APIUrl + "/chat/completions"
-	httpReq, err := http.NewRequestWithContext(ctx, "POST", url, bytes.NewBuffer(jsonBody))
+
+	maxAttempts := req.RetryTimes
+	if maxAttempts < 1 {
+		maxAttempts = 1
+	}
+	var lastErr error
+	for attempt := 0; attempt < maxAttempts; attempt++ {
+		if attempt > 0 {
+			wait := retryBackoff(attempt)
+			log.Printf("[CallModelStream] 第%d次重试, 等待 %v, 上次错误: %v", attempt, wait, lastErr)
+			time.Sleep(wait)
+		}
+
+		if err := limiter.Acquire(ctx, req.Model); err != nil {
+			log.Printf("[CallModelStream] 获取并发槽位失败: %v", err)
+			return &dto.ModelCallProxyResponse{
+				Success: false,
+				Error:   fmt.Sprintf("获取并发槽位失败: %v", err),
+			}
+		}
+		outputChars, started, retryable, err := s.doModelStreamRequest(ctx, client, url, req.APIKey, jsonBody, emit)
+		// 客户端断开时ctx已取消，释放槽位使用独立的context
+		limiter.Release(context.Background(), req.Model)
+
+		if err == nil {
+			s.recordTaskChars(req.TaskID, inputChars, outputChars)
+			return &dto.ModelCallProxyResponse{
+				Success:     true,
+				InputChars:  inputChars,
+				OutputChars: outputChars,
+			}
+		}
+		lastErr = err
+		log.Printf("[CallModelStream] %v", err)
+		if started || !retryable {
+			break
+		}
+	}
+
+	return &dto.ModelCallProxyResponse{
+		Success: false,
+		Error:   lastErr.Error(),
+	}
+}
+
+// doModelStreamRequest 发送一次流式模型请求并逐段透传增量内容
+// started 表示是否已经向调用方透传过内容（此后失败不可重试）
+func (s *ModelService) doModelStreamRequest(ctx context.Context, client *http.Client, url, apiKey string, jsonBody []byte, emit func(delta string) error) (outputChars int, started bool, retryable bool, err error) {
+	httpReq, err := http.NewRequestWithContext(ctx, "POST", url, bytes.NewReader(jsonBody))
 	if err != nil {
-		log.Printf("[CallModel] 创建请求失败: %v", err)
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   fmt.Sprintf("创建请求失败: %v", err),
-		}, nil
+		return 0, false, false, fmt.Errorf("创建请求失败: %v", err)
 	}
 
 	// 设置请求头
 	httpReq.Header.Set("Content-Type", "application/json")
-	if req.APIKey != "" {
-		httpReq.Header.Set("Authorization", "Bearer "+req.APIKey)
+	httpReq.Header.Set("Accept", "text/event-stream")
+	if apiKey != "" {
+		httpReq.Header.Set("Authorization", "Bearer "+apiKey)
 	}
 
-	// 创建HTTP客户端
-	client := &http.Client{
-		Timeout: time.Duration(req.Timeout) * time.Second,
-	}
-
-	// 发送请求
 	resp, err := client.Do(httpReq)
 	if err != nil {
-		log.Printf("[CallModel] 请求失败: %v", err)
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   fmt.Sprintf("请求失败: %v", err),
-		}, nil
+		return 0, false, true, fmt.Errorf("请求失败: %v", err)
 	}
 	defer resp.Body.Close()
 
-	// 读取响应
-	body, err := io.ReadAll(resp.Body)
-	if err != nil {
-		log.Printf("[CallModel] 读取响应失败: %v", err)
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   fmt.Sprintf("读取响应失败: %v", err),
-		}, nil
+	if resp.StatusCode != http.StatusOK {
+		body, _ := io.ReadAll(resp.Body)
+		retryable := resp.StatusCode >= 500 || resp.StatusCode == http.StatusTooManyRequests
+		return 0, false, retryable, fmt.Errorf("API返回错误: status=%d, body=%s", resp.StatusCode, string(body))
+	}
+
+	// 逐行解析上游SSE："data: {...}"，以 "data: [DONE]" 结束
+	reader := bufio.NewReader(resp.Body)
+	for {
+		line, readErr := reader.ReadBytes('\n')
+		line = bytes.TrimSpace(line)
+		if bytes.HasPrefix(line, []byte("data:")) {
+			data := bytes.TrimSpace(line[len("data:"):])
+			if bytes.Equal(data, []byte("[DONE]")) {
+				return outputChars, started, false, nil
+			}
+
+			var chunk dto.ModelStreamChunk
+			if err := json.Unmarshal(data, &chunk); err != nil {
+				return outputChars, started, false, fmt.Errorf("解析流式响应失败: %v", err)
+			}
+			if len(chunk.Choices) > 0 && chunk.Choices[0].Delta.Content != "" {
+				delta := chunk.Choices[0].Delta.Content
+				outputChars += utf8.RuneCountInString(delta)
+				started = true
+				if err := emit(delta); err != nil {
+					return outputChars, started, false, fmt.Errorf("透传流式内容失败: %v", err)
+				}
+			}
+		}
+
+		if readErr != nil {
+			if readErr == io.EOF {
+				return outputChars, started, false, nil
+			}
+			return outputChars, started, true, fmt.Errorf("读取流式响应失败: %v", readErr)
+		}
 	}
+}
 
-	// 检查HTTP状态码
-	if resp.StatusCode != http.StatusOK {
-		log.Printf("[CallModel] API返回错误: status=%d, body=%s", resp.StatusCode, string(body))
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   fmt.Sprintf("API返回错误: status=%d, body=%s", resp.StatusCode, string(body)),
-		}, nil
+// buildModelRequestBody 构建上游 /chat/completions 请求体，同时返回输入字符数
+func buildModelRequestBody(req *dto.ModelCallProxyRequest, stream bool) ([]byte, int, error) {
+	// 构建消息
+	messages := make([]dto.Message, len(req.Messages))
+	for i, msg := range req.Messages {
+		messages[i] = dto.Message{
+			Role:    msg.Role,
+			Content: msg.Content,
+		}
 	}
 
-	// 解析响应
-	var result dto.ModelCallResponse
-	if err := json.Unmarshal(body, &result); err != nil {
-		log.Printf("[CallModel] 解析响应失败: %v", err)
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   fmt.Sprintf("解析响应失败: %v", err),
-		}, nil
+	// 构建请求体（OpenAI与vLLM格式一致）
+	reqBody := map[string]interface{}{
+		"model":       req.Model,
+		"messages":    messages,
+		"max_tokens":  req.MaxTokens,
+		"temperature": req.Temperature,
+		"top_p":       req.TopP,
+	}
+	if stream {
+		reqBody["stream"] = true
 	}
 
-	// 提取内容
-	if len(result.Choices) == 0 {
-		return &dto.ModelCallProxyResponse{
-			Success: false,
-			Error:   "API返回空响应",
-		}, nil
+	// 计算输入字符数（实际字符数，按UTF-8计算）
+	inputChars := 0
+	for _, msg := range req.Messages {
+		inputChars += utf8.RuneCountInString(msg.Content)
 	}
 
-	content := result.Choices[0].Message.Content
+	jsonBody, err := json.Marshal(reqBody)
+	return jsonBody, inputChars, err
+}
 
-	// 计算输出字符数（实际字符数，按UTF-8计算）
-	outputChars := len([]rune(content))
-
-	// 如果提供了task_id，则累加字符数到Redis
-	if req.TaskID != "" {
-		go func() {
-			redisKey := fmt.Sprintf("task_progress:%s", req.TaskID)
-			// 使用HINCRBY累加字符数到Redis哈希表中
-			pipe := s.redisClient.Pipeline()
-			pipe.HIncrBy(ctx, redisKey, "input_chars", int64(inputChars))
-			pipe.HIncrBy(ctx, redisKey, "output_chars", int64(outputChars))
-			pipe.Expire(ctx, redisKey, 24*time.Hour)
-			_, err := pipe.Exec(ctx)
-			if err != nil {
-				log.Printf("[CallModel] 更新Redis字符数失败: %v", err)
-			} else {
-				log.Printf("[CallModel] 任务 %s 字符数更新: input=%d, output=%d", req.TaskID, inputChars, outputChars)
-			}
-		}()
+// recordTaskChars 如果提供了task_id，则异步累加字符数到Redis并推送给进度订阅方
+func (s *ModelService) recordTaskChars(taskID string, inputChars, outputChars int) {
+	if taskID == "" {
+		return
+	}
+	go func() {
+		ctx := context.Background()
+		redisKey := fmt.Sprintf("task_progress:%s", taskID)
+		// 使用HINCRBY累加字符数到Redis哈希表中
+		pipe := s.redisClient.Pipeline()
+		inputTotal := pipe.HIncrBy(ctx, redisKey, "input_chars", int64(inputChars))
+		outputTotal := pipe.HIncrBy(ctx, redisKey, "output_chars", int64(outputChars))
+		pipe.Expire(ctx, redisKey, 24*time.Hour)
+		_, err := pipe.Exec(ctx)
+		if err != nil {
+			log.Printf("[CallModel] 更新Redis字符数失败: %v", err)
+		} else {
+			log.Printf("[CallModel] 任务 %s 字符数更新: input=%d, output=%d", taskID, inputChars, outputChars)
+			// 推送最新字符数给进度订阅方
+			update, _ := json.Marshal(map[string]int64{
+				"input_chars":  inputTotal.Val(),
+				"output_chars": outputTotal.Val(),
+			})
+			s.redisClient.Publish(ctx, "task_progress_events:"+taskID, update)
+		}
+	}()
+}
+
+// doModelRequest 发送一次模型请求
+// 返回值 retryable 表示该错误是否值得重试（网络错误、5xx、429）
+func (s *ModelService) doModelRequest(ctx context.Context, client *http.Client, url, apiKey string, jsonBody []byte) (*dto.ModelCallResponse, bool, error) {
+	httpReq, err := http.NewRequestWithContext(ctx, "POST", url, bytes.NewReader(jsonBody))
+	if err != nil {
+		return nil, false, fmt.Errorf("创建请求失败: %v", err)
 	}
 
-	return &dto.ModelCallProxyResponse{
-		Success:     true,
-		Content:     content,
-		InputChars:  inputChars,
-		OutputChars: outputChars,
-	}, nil
+	// 设置请求头
+	httpReq.Header.Set("Content-Type", "application/json")
+	if apiKey != "" {
+		httpReq.Header.Set("Authorization", "Bearer "+apiKey)
+	}
+
+	// 发送请求
+	resp, err := client.Do(httpReq)
+	if err != nil {
+		return nil, true, fmt.Errorf("请求失败: %v", err)
+	}
+	defer func() {
+		// 读完剩余内容（如解码后尾部的换行）再关闭，连接才能回到共享 Transport 复用
+		io.Copy(io.Discard, resp.Body)
+		resp.Body.Close()
+	}()
+
+	// 检查HTTP状态码，仅在出错时读取完整响应体用于报错
+	if resp.StatusCode != http.StatusOK {
+		body, _ := io.ReadAll(resp.Body)
+		retryable := resp.StatusCode >= 500 || resp.StatusCode == http.StatusTooManyRequests
+		return nil, retryable, fmt.Errorf("API返回错误: status=%d, body=%s", resp.StatusCode, string(body))
+	}
+
+	// 直接从响应流解码，避免先把整个响应体读入内存再解析
+	var result dto.ModelCallResponse
+	if err := json.NewDecoder(resp.Body).Decode(&result); err != nil {
+		// 只有响应内容本身不合法时才不重试；读取响应体时的网络错误或超时仍可重试
+		var syntaxErr *json.SyntaxError
+		var typeErr *json.UnmarshalTypeError
+		if errors.As(err, &syntaxErr) || errors.As(err, &typeErr) {
+			return nil, false, fmt.Errorf("解析响应失败: %v", err)
+		}
+		return nil, true, fmt.Errorf("读取响应失败: %v", err)
+	}
+	return &result, false, nil
+}
+
+// retryBackoff 计算第attempt次重试前的等待时间
+// 指数增长（1s, 2s, 4s...）叠加最多1s随机抖动，上限10s，避免大量客户端同步重试
+func retryBackoff(attempt int) time.Duration {
+	const (
+		initial = time.Second
+		maxWait = 10 * time.Second
+	)
+	wait := maxWait
+	if attempt <= 4 {
+		wait = initial << uint(attempt-1)
+	}
+	wait += time.Duration(rand.Int63n(int64(time.Second)))
+	if wait > maxWait {
+		wait = maxWait
+	}
+	return wait
 }
 
 // getOrCreateLimiter 获取或创建并发限制器
@@ -384,6 +602,41 @@ func (s *ModelService) getOrCreateLimiter(modelKey string, maxConcurrent int) *r
 	return limiter
 }
 
+// getMaxConcurrent 获取模型最大并发数，优先读取缓存
+func (s *ModelService) getMaxConcurrent(modelName string) int {
+	s.concurrencyCacheMu.RLock()
+	entry, ok := s.concurrencyCache[modelName]
+	s.concurrencyCacheMu.RUnlock()
+	if ok && time.Now().Before(entry.expiresAt) {
+		return entry.maxConcurrent
+	}
+
+	// 根据模型名称查找模型配置以获取最大并发数
+	maxConcurrent := defaultMaxConcurrent
+	modelConfig, err := s.getModelConfigByName(modelName)
+	if err != nil {
+		log.Printf("[CallModel] 获取模型配置失败: %v", err)
+		// 如果获取失败，使用默认并发数
+	} else {
+		maxConcurrent = modelConfig.MaxConcurrent
+	}
+
+	s.concurrencyCacheMu.Lock()
+	s.concurrencyCache[modelName] = concurrencyCacheEntry{
+		maxConcurrent: maxConcurrent,
+		expiresAt:     time.Now().Add(concurrencyCacheTTL),
+	}
+	s.concurrencyCacheMu.Unlock()
+	return maxConcurrent
+}
+
+// invalidateConcurrencyCache 模型配置变更后清空最大并发数缓存
+func (s *ModelService) invalidateConcurrencyCache() {
+	s.concurrencyCacheMu.Lock()
+	s.concurrencyCache = make(map[string]concurrencyCacheEntry)
+	s.concurrencyCacheMu.Unlock()
+}
+
 // getModelConfigByName 根据模型名称查找模型配置
 func (s *ModelService) getModelConfigByName(modelName string) (*models.ModelConfig, error) {
 	// 通过模型名称查询模型配置，这里使用ModelPath字段匹配
@@ -5,10 +5,13 @@ import (
 	"context"
 	"encoding/json"
 	"fmt"
+	"io"
 	"log"
 	"os"
 	"os/exec"
+	"sort"
 	"strconv"
+	"strings"
 	"sync"
 	"time"
 
@@ -20,6 +23,34 @@ import (
 	"github.com/go-redis/redis/v8"
 )
 
+// Python输出批量处理参数
+const (
+	outputBatchSize     = 16                    // 每批最多事件数
+	outputFlushInterval = 50 * time.Millisecond // 最长刷新间隔
+)
+
+// outputReadBufferSize 读取子进程输出的缓冲区大小
+const outputReadBufferSize = 64 * 1024
+
+// finishedSendTimeout 订阅者通道满时，完成事件最多等待的时间
+// 完成事件丢失会导致SSE连接一直挂起，因此不能像普通输出那样直接丢弃
+const finishedSendTimeout = time.Second
+
+// 已结束任务在内存中的保留策略：由单个后台协程定期清理，而不是每个任务一个定时器
+const (
+	finishedTaskRetention = 5 * time.Minute  // 任务结束后在内存中保留的时间
+	taskJanitorInterval   = 30 * time.Second // 清理检查间隔
+)
+
+// 任务结束状态的批量写入参数：同一时间窗口内结束的任务合并为一次事务提交
+const (
+	statusBatchSize   = 64
+	statusBatchWindow = 100 * time.Millisecond
+)
+
+// maxEventHistory 每个任务保留的最大历史事件数，避免长任务的历史无限增长
+const maxEventHistory = 10000
+
 // TaskManager 任务管理器
 type TaskManager struct {
 	taskRepo    *repository.TaskRepository
@@ -32,6 +63,9 @@ type TaskManager struct {
 	// 内存中的任务状态
 	tasks     map[string]*TaskContext
 	tasksLock sync.RWMutex
+
+	// 任务结束状态写入队列，由 statusWriter 批量提交
+	statusUpdates chan *taskStatusUpdate
 }
 
 // TaskContext 任务上下文
@@ -52,30 +86,188 @@ type TaskContext struct {
 	Finished         bool
 	StoppedWithChars map[string]int64 // 停止时保存的字符数 {"input": xxx, "output": xxx}
 
+	// 保护本任务的可变状态（Status/Finished/ReturnCode/EndTime/StoppedWithChars）
+	// 只锁单个任务，不与其他任务或任务表竞争；外部读取请使用 State() 获取快照
+	stateLock sync.RWMutex
+
 	// 用于广播的事件历史和订阅者管理
 	EventHistory     []*dto.ProgressEvent
 	EventHistoryLock sync.RWMutex
-	subscribers      map[chan *dto.ProgressEvent]bool
+	subscribers      map[chan *dto.ProgressEvent]int // 值为该订阅者因通道满而丢弃的事件数
 	subscribersLock  sync.RWMutex
 }
 
+// TaskState 任务可变状态的快照
+type TaskState struct {
+	Status     string
+	Finished   bool
+	ReturnCode *int
+	EndTime    *time.Time
+}
+
+// State 获取任务可变状态的快照
+func (tc *TaskContext) State() TaskState {
+	tc.stateLock.RLock()
+	defer tc.stateLock.RUnlock()
+	return TaskState{
+		Status:     tc.Status,
+		Finished:   tc.Finished,
+		ReturnCode: tc.ReturnCode,
+		EndTime:    tc.EndTime,
+	}
+}
+
+// isStopped 任务是否已被用户停止
+func (tc *TaskContext) isStopped() bool {
+	tc.stateLock.RLock()
+	defer tc.stateLock.RUnlock()
+	return tc.Status == "stopped" && tc.StoppedWithChars != nil
+}
+
+// markFinished 标记任务结束，status 为空时保留当前状态
+// 如果任务已被停止则不做修改并返回 false，避免覆盖 StopTask 的结果
+func (tc *TaskContext) markFinished(status string, code int) bool {
+	tc.stateLock.Lock()
+	defer tc.stateLock.Unlock()
+	if tc.Status == "stopped" && tc.StoppedWithChars != nil {
+		return false
+	}
+	if status != "" {
+		tc.Status = status
+	}
+	tc.Finished = true
+	tc.ReturnCode = &code
+	now := time.Now()
+	tc.EndTime = &now
+	return true
+}
+
+// markStopped 标记任务已被停止，并保存停止时的字符数
+func (tc *TaskContext) markStopped(inputChars, outputChars int64) {
+	tc.stateLock.Lock()
+	defer tc.stateLock.Unlock()
+	tc.Status = "stopped"
+	tc.Finished = true
+	code := -1
+	tc.ReturnCode = &code
+	now := time.Now()
+	tc.EndTime = &now
+	tc.StoppedWithChars = map[string]int64{
+		"input":  inputChars,
+		"output": outputChars,
+	}
+}
+
 // AddEvent 添加事件到历史并广播给所有订阅者
 func (tc *TaskContext) AddEvent(event *dto.ProgressEvent) {
 	// 添加到历史
 	tc.EventHistoryLock.Lock()
-	tc.EventHistory = append(tc.EventHistory, event)
+	tc.appendHistoryLocked(event)
 	tc.EventHistoryLock.Unlock()
 
 	// 广播给所有订阅者
-	tc.subscribersLock.RLock()
+	tc.subscribersLock.Lock()
 	for ch := range tc.subscribers {
+		tc.sendToSubscriberLocked(ch, event)
+	}
+	tc.subscribersLock.Unlock()
+}
+
+// sendToSubscriberLocked 向订阅者发送事件（调用方需持有 subscribersLock 写锁）
+// 通道满时丢弃事件并计数，待通道有空间后先补发一条丢弃提示，避免前端日志静默缺失；
+// 完成事件不丢弃，最多等待 finishedSendTimeout
+func (tc *TaskContext) sendToSubscriberLocked(ch chan *dto.ProgressEvent, event *dto.ProgressEvent) {
+	if dropped := tc.subscribers[ch]; dropped > 0 {
 		select {
-		case ch <- event:
+		case ch <- &dto.ProgressEvent{
+			Type:    "output",
+			Line:    fmt.Sprintf("[输出过快，已丢弃 %d 行日志]", dropped),
+			Message: "dropped",
+		}:
+			tc.subscribers[ch] = 0
 		default:
-			// 通道满了，跳过（避免阻塞）
 		}
 	}
-	tc.subscribersLock.RUnlock()
+
+	if event.Type == "finished" {
+		select {
+		case ch <- event:
+		case <-time.After(finishedSendTimeout):
+			log.Printf("[TaskContext] 订阅者通道已满，完成事件发送超时: %s", tc.TaskID)
+		}
+		return
+	}
+
+	select {
+	case ch <- event:
+	default:
+		// 通道满了，计数后跳过（避免阻塞）
+		tc.subscribers[ch]++
+	}
+}
+
+// appendHistoryLocked 追加事件到历史（调用方需持有 EventHistoryLock）
+// 历史最多保留 maxEventHistory 条，超出一定余量后一次性丢弃最旧的事件，均摊复制开销
+func (tc *TaskContext) appendHistoryLocked(events ...*dto.ProgressEvent) {
+	tc.EventHistory = append(tc.EventHistory, events...)
+	if len(tc.EventHistory) > maxEventHistory+maxEventHistory/4 {
+		trimmed := make([]*dto.ProgressEvent, maxEventHistory, maxEventHistory+maxEventHistory/4)
+		copy(trimmed, tc.EventHistory[len(tc.EventHistory)-maxEventHistory:])
+		tc.EventHistory = trimmed
+	}
+}
+
+// AddEvents 批量添加事件到历史并广播给所有订阅者（整批只加一次锁）
+func (tc *TaskContext) AddEvents(events []*dto.ProgressEvent) {
+	if len(events) == 0 {
+		return
+	}
+
+	// 添加到历史
+	tc.EventHistoryLock.Lock()
+	tc.appendHistoryLocked(events...)
+	tc.EventHistoryLock.Unlock()
+
+	// 广播给所有订阅者
+	tc.subscribersLock.Lock()
+	for ch := range tc.subscribers {
+		for _, event := range events {
+			tc.sendToSubscriberLocked(ch, event)
+		}
+	}
+	tc.subscribersLock.Unlock()
+}
+
+// batchEvents 从通道中读取事件并批量写入任务上下文
+// 攒满 outputBatchSize 条或距上次刷新超过 outputFlushInterval 时刷新一次，通道关闭后刷新剩余事件
+func (tc *TaskContext) batchEvents(events <-chan *dto.ProgressEvent) {
+	batch := make([]*dto.ProgressEvent, 0, outputBatchSize)
+	ticker := time.NewTicker(outputFlushInterval)
+	defer ticker.Stop()
+
+	flush := func() {
+		if len(batch) > 0 {
+			tc.AddEvents(batch)
+			// AddEvents 只复制元素，批次切片可以复用
+			batch = batch[:0]
+		}
+	}
+
+	for {
+		select {
+		case event, ok := <-events:
+			if !ok {
+				flush()
+				return
+			}
+			batch = append(batch, event)
+			if len(batch) >= outputBatchSize {
+				flush()
+			}
+		case <-ticker.C:
+			flush()
+		}
+	}
 }
 
 // Subscribe 订阅事件（返回一个接收事件的通道）
@@ -84,9 +276,9 @@ func (tc *TaskContext) Subscribe() chan *dto.ProgressEvent {
 
 	tc.subscribersLock.Lock()
 	if tc.subscribers == nil {
-		tc.subscribers = make(map[chan *dto.ProgressEvent]bool)
+		tc.subscribers = make(map[chan *dto.ProgressEvent]int)
 	}
-	tc.subscribers[ch] = true
+	tc.subscribers[ch] = 0
 	tc.subscribersLock.Unlock()
 
 	return ch
@@ -106,8 +298,13 @@ func (tc *TaskContext) GetEventHistory() []*dto.ProgressEvent {
 	tc.EventHistoryLock.RLock()
 	defer tc.EventHistoryLock.RUnlock()
 
-	history := make([]*dto.ProgressEvent, len(tc.EventHistory))
-	copy(history, tc.EventHistory)
+	// 只返回最近 maxEventHistory 条
+	src := tc.EventHistory
+	if len(src) > maxEventHistory {
+		src = src[len(src)-maxEventHistory:]
+	}
+	history := make([]*dto.ProgressEvent, len(src))
+	copy(history, src)
 	return history
 }
 
@@ -120,7 +317,7 @@ func NewTaskManager(
 	redisClient *redis.Client,
 	cfg *config.Config,
 ) *TaskManager {
-	return &TaskManager{
+	tm := &TaskManager{
 		taskRepo:    taskRepo,
 		userRepo:    userRepo,
 		fileRepo:    fileRepo,
@@ -128,6 +325,99 @@ func NewTaskManager(
 		redisClient: redisClient,
 		cfg:         cfg,
 		tasks:       make(map[string]*TaskContext),
+
+		statusUpdates: make(chan *taskStatusUpdate, statusBatchSize*4),
+	}
+
+	go tm.evictFinishedTasks()
+	go tm.statusWriter()
+
+	return tm
+}
+
+// taskStatusUpdate 排队等待写入数据库的任务状态
+type taskStatusUpdate struct {
+	repository.TaskStatusUpdate
+	done chan error
+}
+
+// updateTaskStatus 提交任务结束状态并等待写入完成
+// 并发结束的任务会被合并到同一个事务中提交，调用方在提交完成后才返回，保证后续的完成事件晚于数据库更新
+func (tm *TaskManager) updateTaskStatus(taskID, status string, inputChars, outputChars int64) error {
+	u := &taskStatusUpdate{
+		TaskStatusUpdate: repository.TaskStatusUpdate{
+			TaskID:      taskID,
+			Status:      status,
+			InputChars:  inputChars,
+			OutputChars: outputChars,
+		},
+		done: make(chan error, 1),
+	}
+	tm.statusUpdates <- u
+	return <-u.done
+}
+
+// statusWriter 批量写入任务结束状态：收到第一条更新后最多再等待 statusBatchWindow 或攒满 statusBatchSize 条
+func (tm *TaskManager) statusWriter() {
+	pending := make([]*taskStatusUpdate, 0, statusBatchSize)
+	updates := make([]repository.TaskStatusUpdate, 0, statusBatchSize)
+
+	for first := range tm.statusUpdates {
+		pending = append(pending[:0], first)
+		timer := time.NewTimer(statusBatchWindow)
+	collect:
+		for len(pending) < statusBatchSize {
+			select {
+			case u := <-tm.statusUpdates:
+				pending = append(pending, u)
+			case <-timer.C:
+				break collect
+			}
+		}
+		timer.Stop()
+
+		updates = updates[:0]
+		for _, u := range pending {
+			updates = append(updates, u.TaskStatusUpdate)
+		}
+		err := tm.taskRepo.BatchUpdateStatusWithTimeAndChars(updates)
+		if err != nil {
+			log.Printf("[statusWriter] 批量更新 %d 个任务状态失败: %v", len(updates), err)
+		}
+		for _, u := range pending {
+			u.done <- err
+		}
+	}
+}
+
+// evictFinishedTasks 定期从内存中移除结束超过 finishedTaskRetention 的任务，释放其事件历史
+// 清理后 GetTaskStatus 和 DeleteTask 改为查询数据库中的任务记录
+func (tm *TaskManager) evictFinishedTasks() {
+	ticker := time.NewTicker(taskJanitorInterval)
+	defer ticker.Stop()
+
+	for range ticker.C {
+		var expired []string
+		tm.tasksLock.RLock()
+		for taskID, taskCtx := range tm.tasks {
+			state := taskCtx.State()
+			if state.Finished && state.EndTime != nil && time.Since(*state.EndTime) > finishedTaskRetention {
+				expired = append(expired, taskID)
+			}
+		}
+		tm.tasksLock.RUnlock()
+
+		if len(expired) == 0 {
+			continue
+		}
+
+		tm.tasksLock.Lock()
+		for _, taskID := range expired {
+			delete(tm.tasks, taskID)
+		}
+		tm.tasksLock.Unlock()
+
+		log.Printf("[evictFinishedTasks] 已从内存清理 %d 个结束的任务", len(expired))
 	}
 }
 
@@ -182,7 +472,7 @@ func (tm *TaskManager) StartTask(userID uint, req *dto.StartTaskRequest) (*dto.S
 	log.Printf("[StartTask] 解析到文件ID: %d", fileID)
 
 	// 验证文件是否存在
-	file, err := tm.fileRepo.GetByIDAndUserID(fileID, userID)
+	file, err := tm.fileRepo.GetMetaByIDAndUserID(fileID, userID)
 	if err != nil {
 		log.Printf("[StartTask] 错误: 文件不存在或无权访问: %v", err)
 		return nil, fmt.Errorf("文件不存在或无权访问")
@@ -389,53 +679,57 @@ func (tm *TaskManager) runTask(ctx context.Context, taskCtx *TaskContext) {
 	// 读取输出
 	done := make(chan error, 2)
 
+	// 输出行先进入事件通道，由批处理goroutine按批写入历史并广播，减少每行加锁次数
+	events := make(chan *dto.ProgressEvent, 256)
+	batchDone := make(chan struct{})
+	go func() {
+		taskCtx.batchEvents(events)
+		close(batchDone)
+	}()
+
 	// 读取标准输出
 	go func() {
 		log.Printf("[runTask] 开始读取标准输出...")
-		scanner := bufio.NewScanner(stdout)
-		lineCount := 0
-		for scanner.Scan() {
-			line := scanner.Text()
-			lineCount++
+		lineCount, readErr := readOutputLines(stdout, func(line string) {
 			log.Printf("[Python STDOUT] %s", line)
-			tm.handlePythonOutput(taskCtx, line)
-		}
+			events <- tm.parsePythonOutput(line)
+		})
 		log.Printf("[runTask] 标准输出读取完成，共 %d 行", lineCount)
-		done <- scanner.Err()
+		done <- readErr
 	}()
 
 	// 读取错误输出
 	go func() {
 		log.Printf("[runTask] 开始读取错误输出...")
-		scanner := bufio.NewScanner(stderr)
-		lineCount := 0
-		for scanner.Scan() {
-			line := scanner.Text()
-			lineCount++
+		lineCount, readErr := readOutputLines(stderr, func(line string) {
 			log.Printf("[Python STDERR] %s", line)
-			taskCtx.AddEvent(&dto.ProgressEvent{
+			events <- &dto.ProgressEvent{
 				Type:    "error",
 				Line:    line,
 				Message: "错误",
-			})
-		}
+			}
+		})
 		log.Printf("[runTask] 错误输出读取完成，共 %d 行", lineCount)
-		done <- scanner.Err()
+		done <- readErr
 	}()
 
-	// 等待进程完成
+	// 先等待输出读取完成：cmd.Wait 会关闭管道，在读取结束前调用可能丢失进程最后的输出
 	log.Printf("[runTask] 等待Python进程完成...")
-	err = cmd.Wait()
-
-	// 等待所有goroutine完成
 	for i := 0; i < 2; i++ {
 		<-done
 	}
 
+	// 输出读取完毕，刷新剩余的批量事件，保证其先于完成事件写入
+	close(events)
+	<-batchDone
+
+	// 等待进程退出并回收
+	err = cmd.Wait()
+
 	log.Printf("[runTask] Python进程已结束，错误: %v", err)
 
 	// 检查任务是否已被停止（避免覆盖StopTask设置的字符数）
-	if taskCtx.Status == "stopped" && taskCtx.StoppedWithChars != nil {
+	if taskCtx.isStopped() {
 		// 任务已被停止，跳过数据库更新
 		log.Printf("[runTask] 任务已被停止,跳过数据库更新")
 		return
@@ -472,10 +766,11 @@ func (tm *TaskManager) runTask(ctx context.Context, taskCtx *TaskContext) {
 		})
 	}
 
-	taskCtx.Finished = true
-	taskCtx.ReturnCode = &code
-	now := time.Now()
-	taskCtx.EndTime = &now
+	// 读取字符数期间任务可能被停止，标记与检查在同一把锁内完成
+	if !taskCtx.markFinished("", code) {
+		log.Printf("[runTask] 任务已被停止,跳过数据库更新")
+		return
+	}
 
 	// 更新数据库
 	status := "finished"
@@ -485,7 +780,9 @@ func (tm *TaskManager) runTask(ctx context.Context, taskCtx *TaskContext) {
 
 	log.Printf("[runTask] 更新任务状态为: %s", status)
 	// 更新状态和字符数
-	tm.taskRepo.UpdateStatusWithTimeAndChars(taskCtx.TaskID, status, inputChars, outputChars)
+	if err := tm.updateTaskStatus(taskCtx.TaskID, status, inputChars, outputChars); err != nil {
+		log.Printf("[runTask] 更新任务状态失败: %v", err)
+	}
 
 	// 发送完成事件
 	taskCtx.AddEvent(&dto.ProgressEvent{
@@ -569,6 +866,33 @@ func (tm *TaskManager) releaseModelToken(ctx context.Context, key string) {
 	tm.redisClient.Decr(ctx, key)
 }
 
+// pythonArgSpec 任务参数到 main.py 命令行参数的映射
+type pythonArgSpec struct {
+	flag       string
+	param      string
+	intDefault *int // 非空表示整数参数
+	strDefault string
+}
+
+func intPtr(v int) *int { return &v }
+
+// pythonTaskArgs 始终传递的任务参数（顺序即命令行顺序）
+var pythonTaskArgs = []pythonArgSpec{
+	{flag: "--batch-size", param: "batch_size", intDefault: intPtr(16)},
+	{flag: "--max-concurrent", param: "max_concurrent", intDefault: intPtr(16)},
+	{flag: "--min-score", param: "min_score", intDefault: intPtr(10)},
+	{flag: "--task-type", param: "task_type", strDefault: "general"},
+	{flag: "--variants-per-sample", param: "variants_per_sample", intDefault: intPtr(3)},
+	{flag: "--data-rounds", param: "data_rounds", intDefault: intPtr(10)},
+	{flag: "--retry-times", param: "retry_times", intDefault: intPtr(3)},
+}
+
+// pythonOptionalArgs 仅在非空时传递的字符串参数
+var pythonOptionalArgs = []pythonArgSpec{
+	{flag: "--special-prompt", param: "special_prompt"},
+	{flag: "--directions", param: "directions"},
+}
+
 // buildPythonArgs 构建Python命令参数
 func (tm *TaskManager) buildPythonArgs(taskCtx *TaskContext, services []string) []string {
 	// 从taskCtx.Params中获取参数（处理int和float64两种类型）
@@ -593,29 +917,25 @@ func (tm *TaskManager) buildPythonArgs(taskCtx *TaskContext, services []string)
 		return defaultVal
 	}
 
-	batchSize := getIntParam("batch_size", 16)
-	maxConcurrent := getIntParam("max_concurrent", 16)
-	minScore := getIntParam("min_score", 10)
-	taskType := getStringParam("task_type", "general")
-	variantsPerSample := getIntParam("variants_per_sample", 3)
-	dataRounds := getIntParam("data_rounds", 10)
-	retryTimes := getIntParam("retry_times", 3)
-	specialPrompt := getStringParam("special_prompt", "")
-	directions := getStringParam("directions", "")
-
-	args := []string{
+	// 预估参数个数：固定参数 + 每个服务地址两项 + 模型配置与可选参数
+	args := make([]string, 0, 1+2*(4+len(pythonTaskArgs))+2*len(services)+12)
+	args = append(args,
 		"main.py",
 		"--file-id", strconv.FormatUint(uint64(taskCtx.FileID), 10),
 		"--user-id", strconv.FormatUint(uint64(taskCtx.UserID), 10),
 		"--task-id", taskCtx.TaskID,
 		"--model", taskCtx.ModelPath,
-		"--batch-size", strconv.Itoa(batchSize),
-		"--max-concurrent", strconv.Itoa(maxConcurrent),
-		"--min-score", strconv.Itoa(minScore),
-		"--task-type", taskType,
-		"--variants-per-sample", strconv.Itoa(variantsPerSample),
-		"--data-rounds", strconv.Itoa(dataRounds),
-		"--retry-times", strconv.Itoa(retryTimes),
+	)
+
+	// 按表追加任务参数
+	for _, spec := range pythonTaskArgs {
+		var value string
+		if spec.intDefault != nil {
+			value = strconv.Itoa(getIntParam(spec.param, *spec.intDefault))
+		} else {
+			value = getStringParam(spec.param, spec.strDefault)
+		}
+		args = append(args, spec.flag, value)
 	}
 
 	// 添加服务地址
@@ -636,49 +956,62 @@ func (tm *TaskManager) buildPythonArgs(taskCtx *TaskContext, services []string)
 		args = append(args, "--timeout", strconv.Itoa(taskCtx.ModelConfig.Timeout))
 	}
 
-	// 可选参数
-	if specialPrompt != "" {
-		args = append(args, "--special-prompt", specialPrompt)
-	}
-
-	if directions != "" {
-		// Directions 是一个字符串，需要传递给 Python
-		args = append(args, "--directions", directions)
+	// 可选参数：为空时不传递
+	for _, spec := range pythonOptionalArgs {
+		if value := getStringParam(spec.param, ""); value != "" {
+			args = append(args, spec.flag, value)
+		}
 	}
 
 	return args
 }
 
-// handlePythonOutput 处理Python输出并转换为进度事件
-func (tm *TaskManager) handlePythonOutput(taskCtx *TaskContext, line string) {
+// readOutputLines 按行读取子进程输出，每行回调一次，返回读取的行数
+// 使用 64KB 缓冲区整块读取，且不限制单行长度：bufio.Scanner 遇到超过 64KB
+// 的行会直接报错退出，导致管道无人读取、子进程写满管道后阻塞
+func readOutputLines(r io.Reader, handle func(line string)) (int, error) {
+	reader := bufio.NewReaderSize(r, outputReadBufferSize)
+	lineCount := 0
+	for {
+		line, err := reader.ReadString('\n')
+		if len(line) > 0 {
+			line = strings.TrimRight(line, "\r\n")
+			lineCount++
+			handle(line)
+		}
+		if err != nil {
+			if err == io.EOF {
+				return lineCount, nil
+			}
+			return lineCount, err
+		}
+	}
+}
+
+// parsePythonOutput 将Python输出转换为进度事件
+func (tm *TaskManager) parsePythonOutput(line string) *dto.ProgressEvent {
 	// 尝试解析JSON格式的输出
 	var output map[string]interface{}
 	if err := json.Unmarshal([]byte(line), &output); err == nil {
 		// JSON格式输出
 		if progress, ok := output["progress"].(map[string]interface{}); ok {
-			taskCtx.AddEvent(&dto.ProgressEvent{
+			return &dto.ProgressEvent{
 				Type:    "progress",
 				Message: fmt.Sprintf("进度: %v", progress),
-			})
+			}
 		} else if result, ok := output["result"].(map[string]interface{}); ok {
-			taskCtx.AddEvent(&dto.ProgressEvent{
+			return &dto.ProgressEvent{
 				Type:    "result",
 				Message: fmt.Sprintf("生成结果: %v", result),
-			})
-		} else {
-			taskCtx.AddEvent(&dto.ProgressEvent{
-				Type:    "output",
-				Line:    line,
-				Message: "输出",
-			})
+			}
 		}
-	} else {
-		// 普通文本输出
-		taskCtx.AddEvent(&dto.ProgressEvent{
-			Type:    "output",
-			Line:    line,
-			Message: "输出",
-		})
+	}
+
+	// 普通文本输出
+	return &dto.ProgressEvent{
+		Type:    "output",
+		Line:    line,
+		Message: "输出",
 	}
 }
 
@@ -691,12 +1024,7 @@ func (tc *TaskContext) Error(message string) {
 	}
 
 	// 标记任务失败
-	code := 1
-	tc.Finished = true
-	tc.ReturnCode = &code
-	tc.Status = "error"
-	now := time.Now()
-	tc.EndTime = &now
+	tc.markFinished("error", 1)
 }
 
 // StopTask 停止任务
@@ -731,22 +1059,15 @@ func (tm *TaskManager) StopTask(taskID string, userID uint) error {
 			}
 		}
 
+		// 先更新状态并保存字符数到上下文（用于runTask检测），再取消任务，
+		// 保证进程退出后runTask一定能看到停止状态
+		taskCtx.markStopped(inputChars, outputChars)
+
 		// 取消任务
 		if taskCtx.CancelFunc != nil {
 			taskCtx.CancelFunc()
 		}
 
-		// 更新状态并保存字符数到上下文
-		taskCtx.Status = "stopped"
-		taskCtx.Finished = true
-		code := -1
-		taskCtx.ReturnCode = &code
-		// 保存字符数到上下文，用于runTask检测
-		taskCtx.StoppedWithChars = map[string]int64{
-			"input":  inputChars,
-			"output": outputChars,
-		}
-
 		tm.taskRepo.UpdateStatusWithTimeAndChars(taskID, "stopped", inputChars, outputChars)
 
 		// 清理Redis中的进度数据
@@ -828,15 +1149,58 @@ func (tm *TaskManager) GetTask(taskID string) (*TaskContext, bool) {
 	return taskCtx, exists
 }
 
+// GetTaskStatus 获取任务状态
+// 内存中不存在时（结束的任务会被定期清理，或后端重启过）以数据库记录为准
+func (tm *TaskManager) GetTaskStatus(taskID string) (*dto.TaskStatusResponse, error) {
+	if taskCtx, exists := tm.GetTask(taskID); exists {
+		state := taskCtx.State()
+		return &dto.TaskStatusResponse{
+			TaskID:     taskID,
+			Status:     state.Status,
+			Finished:   state.Finished,
+			ReturnCode: state.ReturnCode,
+		}, nil
+	}
+
+	task, err := tm.taskRepo.GetByTaskID(taskID)
+	if err != nil {
+		return nil, fmt.Errorf("任务不存在")
+	}
+
+	resp := &dto.TaskStatusResponse{
+		TaskID:   taskID,
+		Status:   task.Status,
+		Finished: task.Status != "running",
+	}
+	// 与内存中的退出码保持一致：正常结束为0，失败为1，停止为-1
+	var code int
+	switch task.Status {
+	case "finished":
+		code = 0
+		resp.ReturnCode = &code
+	case "error":
+		code = 1
+		resp.ReturnCode = &code
+	case "stopped":
+		code = -1
+		resp.ReturnCode = &code
+	}
+	return resp, nil
+}
+
 // GetAllTasks 获取所有任务
+// 返回的任务按开始时间倒序排列，排序在释放锁之后进行
 func (tm *TaskManager) GetAllTasks() []*TaskContext {
 	tm.tasksLock.RLock()
-	defer tm.tasksLock.RUnlock()
-
 	tasks := make([]*TaskContext, 0, len(tm.tasks))
 	for _, task := range tm.tasks {
 		tasks = append(tasks, task)
 	}
+	tm.tasksLock.RUnlock()
+
+	sort.Slice(tasks, func(i, j int) bool {
+		return tasks[i].StartTime.After(tasks[j].StartTime)
+	})
 	return tasks
 }
 
@@ -872,14 +1236,26 @@ func (tm *TaskManager) DeleteTask(taskID string, userID uint) error {
 	tm.tasksLock.RUnlock()
 
 	if !exists {
-		return fmt.Errorf("任务不存在")
+		// 内存中不存在时（结束的任务会被定期清理，或后端重启过）以数据库记录为准
+		task, err := tm.taskRepo.GetByTaskID(taskID)
+		if err != nil {
+			return fmt.Errorf("任务不存在")
+		}
+		if task.UserID != userID {
+			return fmt.Errorf("无权删除此任务")
+		}
+		if task.Status == "running" {
+			return fmt.Errorf("只能删除已完成的任务")
+		}
+		tm.taskRepo.DeleteByTaskID(taskID)
+		return nil
 	}
 
 	if taskCtx.UserID != userID {
 		return fmt.Errorf("无权删除此任务")
 	}
 
-	if !taskCtx.Finished {
+	if !taskCtx.State().Finished {
 		return fmt.Errorf("只能删除已完成的任务")
 	}
 
@@ -895,17 +1271,30 @@ func (tm *TaskManager) DeleteTask(taskID string, userID uint) error {
 }
 
 // generateUniqueTaskID 生成唯一任务ID
+// 一次查询取出所有同前缀的任务ID，再结合内存中的任务在本地选出最小可用后缀
 func (tm *TaskManager) generateUniqueTaskID(base string) string {
-	taskID := base
-	counter := 1
+	existing := make(map[string]struct{})
 
-	for {
-		exists, _ := tm.taskRepo.ExistsByTaskID(taskID)
-		if !exists {
+	taskIDs, err := tm.taskRepo.ListTaskIDsByPrefix(base)
+	if err != nil {
+		log.Printf("[generateUniqueTaskID] 查询已有任务ID失败: %v", err)
+	}
+	for _, id := range taskIDs {
+		existing[id] = struct{}{}
+	}
+
+	tm.tasksLock.RLock()
+	for id := range tm.tasks {
+		existing[id] = struct{}{}
+	}
+	tm.tasksLock.RUnlock()
+
+	taskID := base
+	for counter := 1; ; counter++ {
+		if _, ok := existing[taskID]; !ok {
 			break
 		}
 		taskID = fmt.Sprintf("%s_%d", base, counter)
-		counter++
 	}
 
 	return taskID
@@ -2,6 +2,7 @@ package utils
 
 import (
 	"errors"
+	"sync"
 	"time"
 
 	"github.com/golang-jwt/jwt/v5"
@@ -15,19 +16,45 @@ type JWTClaims struct {
 	jwt.RegisteredClaims
 }
 
+// 已验证Token的缓存参数：同一Token在短时间内重复请求时跳过签名校验和声明解析
+const (
+	claimsCacheTTL     = 30 * time.Second
+	claimsCacheMaxSize = 4096
+)
+
+// cachedClaims 已验证的Token声明缓存项
+type cachedClaims struct {
+	claims    *JWTClaims
+	expiresAt time.Time
+}
+
 // JWTManager JWT管理器
 type JWTManager struct {
 	secretKey  []byte
 	algorithm  jwt.SigningMethod
 	expireTime time.Duration
+
+	// 预先构建的解析器和密钥函数，解析时不再重复创建选项和闭包
+	parser  *jwt.Parser
+	keyFunc jwt.Keyfunc
+
+	claimsCache   map[string]cachedClaims
+	claimsCacheMu sync.RWMutex
 }
 
 // NewJWTManager 创建JWT管理器
 func NewJWTManager(secretKey string, algorithm string, expireTime time.Duration) *JWTManager {
+	key := []byte(secretKey)
 	return &JWTManager{
-		secretKey:  []byte(secretKey),
+		secretKey:  key,
 		algorithm:  jwt.GetSigningMethod(algorithm),
 		expireTime: expireTime,
+		// 只接受配置的签名算法，由解析器在校验签名前检查
+		parser: jwt.NewParser(jwt.WithValidMethods([]string{algorithm})),
+		keyFunc: func(token *jwt.Token) (interface{}, error) {
+			return key, nil
+		},
+		claimsCache: make(map[string]cachedClaims),
 	}
 }
 
@@ -50,13 +77,51 @@ func (j *JWTManager) GenerateToken(userID uint, username string, isAdmin bool) (
 }
 
 // ValidateToken 验证Token
+// 验证通过的声明会缓存 claimsCacheTTL（不超过Token本身的过期时间），返回的声明不应被修改
 func (j *JWTManager) ValidateToken(tokenString string) (*JWTClaims, error) {
-	token, err := jwt.ParseWithClaims(tokenString, &JWTClaims{}, func(token *jwt.Token) (interface{}, error) {
-		if token.Method != j.algorithm {
-			return nil, errors.New("无效的签名算法")
+	now := time.Now()
+	j.claimsCacheMu.RLock()
+	entry, ok := j.claimsCache[tokenString]
+	j.claimsCacheMu.RUnlock()
+	if ok && now.Before(entry.expiresAt) {
+		return entry.claims, nil
+	}
+
+	claims, err := j.parseToken(tokenString)
+	if err != nil {
+		return nil, err
+	}
+
+	expiresAt := now.Add(claimsCacheTTL)
+	if claims.ExpiresAt != nil && claims.ExpiresAt.Time.Before(expiresAt) {
+		expiresAt = claims.ExpiresAt.Time
+	}
+	j.cacheClaims(tokenString, cachedClaims{claims: claims, expiresAt: expiresAt}, now)
+
+	return claims, nil
+}
+
+// cacheClaims 写入声明缓存，缓存已满时先清理过期项，仍然满则整体清空
+func (j *JWTManager) cacheClaims(tokenString string, entry cachedClaims, now time.Time) {
+	j.claimsCacheMu.Lock()
+	defer j.claimsCacheMu.Unlock()
+
+	if len(j.claimsCache) >= claimsCacheMaxSize {
+		for key, cached := range j.claimsCache {
+			if !now.Before(cached.expiresAt) {
+				delete(j.claimsCache, key)
+			}
+		}
+		if len(j.claimsCache) >= claimsCacheMaxSize {
+			j.claimsCache = make(map[string]cachedClaims)
 		}
-		return j.secretKey, nil
-	})
+	}
+	j.claimsCache[tokenString] = entry
+}
+
+// parseToken 解析并校验Token签名与有效期
+func (j *JWTManager) parseToken(tokenString string) (*JWTClaims, error) {
+	token, err := j.parser.ParseWithClaims(tokenString, &JWTClaims{}, j.keyFunc)
 
 	if err != nil {
 		return nil, err
@@ -1,6 +1,9 @@
 package utils
 
 import (
+	"bufio"
+	"encoding/json"
+	"io"
 	"net/http"
 
 	"github.com/gin-gonic/gin"
@@ -85,3 +88,86 @@ func PaginatedResponse(c *gin.Context, data interface{}, total int64, page int,
 		PerPage: perPage,
 	})
 }
+
+// StreamSuccessList 以流式方式输出成功响应（统一响应格式），列表元素逐条编码写出
+// fields 为 data 对象中除列表外的字段，listKey 为列表字段名
+// iterate 通过 emit 逐条写出列表元素，避免在内存中构建完整列表
+// 出错时若尚未向客户端写出任何字节则返回500错误响应，否则中断连接，不会把截断的列表作为成功结果输出
+func StreamSuccessList(c *gin.Context, fields map[string]interface{}, listKey string, iterate func(emit func(item interface{}) error) error) error {
+	c.Header("Content-Type", "application/json; charset=utf-8")
+	c.Status(http.StatusOK)
+
+	// 先写入缓冲区，首批数据（包括第一行的读取）完成前不会向客户端输出
+	w := bufio.NewWriterSize(c.Writer, 32*1024)
+	enc := json.NewEncoder(w)
+
+	err := func() error {
+		w.WriteString(`{"code":200,"message":"成功","data":{`)
+		for key, value := range fields {
+			enc.Encode(key)
+			w.WriteByte(':')
+			if err := enc.Encode(value); err != nil {
+				return err
+			}
+			w.WriteByte(',')
+		}
+		enc.Encode(listKey)
+		w.WriteString(":[")
+
+		first := true
+		if err := iterate(func(item interface{}) error {
+			if !first {
+				w.WriteByte(',')
+			}
+			first = false
+			return enc.Encode(item)
+		}); err != nil {
+			return err
+		}
+
+		w.WriteString("]}}")
+		return nil
+	}()
+	if err != nil {
+		if c.Writer.Written() {
+			abortConnection(c)
+		} else {
+			InternalError(c, err.Error())
+		}
+		return err
+	}
+	return w.Flush()
+}
+
+// abortConnection 中断已开始输出的响应：直接关闭底层连接，客户端收到的是不完整的响应而不是被截断的成功结果
+func abortConnection(c *gin.Context) {
+	if conn, _, err := c.Writer.Hijack(); err == nil {
+		conn.Close()
+		return
+	}
+	// 不支持 Hijack（如 HTTP/2）时交给 net/http 中断该请求
+	panic(http.ErrAbortHandler)
+}
+
+// SSEHeaders 设置SSE响应头
+func SSEHeaders(c *gin.Context) {
+	c.Header("Content-Type", "text/event-stream")
+	c.Header("Cache-Control", "no-cache")
+	c.Header("Connection", "keep-alive")
+	c.Header("X-Accel-Buffering", "no")
+}
+
+// SSEData 将数据编码为JSON并写出一帧 "data: ...\n\n"（调用方负责 Flush）
+// 编码结果直接以字节写出，省去 gin SSE 渲染器的字符串转换和换行转义扫描（JSON 编码不含换行）
+func SSEData(w io.Writer, v interface{}) error {
+	data, err := json.Marshal(v)
+	if err != nil {
+		return err
+	}
+	frame := make([]byte, 0, len(data)+8)
+	frame = append(frame, "data: "...)
+	frame = append(frame, data...)
+	frame = append(frame, "\n\n"...)
+	_, err = w.Write(frame)
+	return err
+}
@@ -9,6 +9,45 @@ import (
 	"github.com/go-redis/redis/v8"
 )
 
+// acquireScript 获取槽位的Lua脚本（包级别只构建一次，SHA随之缓存，后续走EVALSHA）
+// 脚本逻辑：
+// 1. INCR计数，仅在key新建（计数为1）时设置过期时间
+// 2. 如果超过最大并发数，则DECR回滚并返回0表示失败
+// 3. 否则返回新计数
+var acquireScript = redis.NewScript(`local c = redis.call('INCR', KEYS[1])
+if c == 1 then
+	redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+if c > tonumber(ARGV[1]) then
+	redis.call('DECR', KEYS[1])
+	return 0
+end
+return c`)
+
+// releaseScript 释放槽位的Lua脚本
+// 脚本逻辑：
+// 1. 减少计数
+// 2. 如果结果 <= 0，删除key；否则重新设置过期时间
+var releaseScript = redis.NewScript(`local count = redis.call('DECR', KEYS[1])
+if tonumber(count) <= 0 then
+	redis.call('DEL', KEYS[1])
+	return 0
+else
+	redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+	return count
+end`)
+
+// LoadScripts 在服务启动时预加载限制器Lua脚本（SCRIPT LOAD）
+// 预加载后首次Acquire/Release即可直接命中EVALSHA，避免冷启动时的NOSCRIPT往返
+func LoadScripts(ctx context.Context, client *redis.Client) error {
+	for _, script := range []*redis.Script{acquireScript, releaseScript} {
+		if err := script.Load(ctx, client).Err(); err != nil {
+			return fmt.Errorf("预加载Lua脚本失败: %w", err)
+		}
+	}
+	return nil
+}
+
 // RedisLimiter 基于Redis的并发限制器
 type RedisLimiter struct {
 	client        *redis.Client
@@ -33,28 +72,6 @@ func NewRedisLimiter(client *redis.Client, maxConcurrent int, keyPrefix string,
 func (rl *RedisLimiter) Acquire(ctx context.Context, key string) error {
 	redisKey := rl.keyPrefix + key
 
-	// 使用Lua脚本确保原子性操作
-	// 脚本逻辑：
-	// 1. 获取当前值
-	// 2. 如果当前值小于最大并发数，则增加1并设置过期时间，返回新值
-	// 3. 否则返回当前值
-	script := redis.NewScript(
-		`local current = redis.call('GET', KEYS[1])
-		if current == false then
-			current = 0
-		else
-			current = tonumber(current)
-		end
-
-		if current >= tonumber(ARGV[1]) then
-			return current + 1  -- 返回超过限制的值以表示失败
-		end
-
-		local newCount = redis.call('INCR', KEYS[1])
-		redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
-		return newCount`,
-	)
-
 	// 轮询等待槽位
 	startTime := time.Now()
 	retryInterval := 500 * time.Millisecond // 重试间隔500毫秒
@@ -67,18 +84,17 @@ func (rl *RedisLimiter) Acquire(ctx context.Context, key string) error {
 			return fmt.Errorf("获取并发槽位超时: 已等待 %v, 超过最大等待时间 %v", elapsed.Round(time.Second), rl.maxWaitTime)
 		}
 
-		result, err := script.Run(ctx, rl.client, []string{redisKey}, rl.maxConcurrent, int(rl.ttl.Seconds())).Result()
+		result, err := acquireScript.Run(ctx, rl.client, []string{redisKey}, rl.maxConcurrent, int(rl.ttl.Seconds())).Result()
 		if err != nil {
 			return fmt.Errorf("执行Lua脚本失败: %w", err)
 		}
 
 		newCount := int(result.(int64))
-		log.Printf("[RedisLimiter] 模型: %s, 当前槽位数: %d, 最大槽位数: %d", key, newCount-1, rl.maxConcurrent)
 
-		// 检查是否超过了限制
-		if newCount > rl.maxConcurrent {
+		// 返回0表示槽位已满
+		if newCount == 0 {
 			// 槽位已满，等待后重试
-			log.Printf("[RedisLimiter] 模型: %s, 槽位已满, 当前: %d, 最大: %d, 已等待: %v, 等待重试...", key, newCount-1, rl.maxConcurrent, elapsed.Round(time.Second))
+			log.Printf("[RedisLimiter] 模型: %s, 槽位已满, 最大: %d, 已等待: %v, 等待重试...", key, rl.maxConcurrent, elapsed.Round(time.Second))
 
 			// 计算下一次重试的等待时间（指数退避，但不超过最大间隔）
 			nextRetryInterval := retryInterval * 2
@@ -105,22 +121,7 @@ func (rl *RedisLimiter) Acquire(ctx context.Context, key string) error {
 func (rl *RedisLimiter) Release(ctx context.Context, key string) {
 	redisKey := rl.keyPrefix + key
 
-	// 使用Lua脚本确保原子性操作
-	// 脚本逻辑：
-	// 1. 减少计数
-	// 2. 如果结果 <= 0，删除key；否则重新设置过期时间
-	script := redis.NewScript(
-		`local count = redis.call('DECR', KEYS[1])
-		if tonumber(count) <= 0 then
-			redis.call('DEL', KEYS[1])
-			return 0
-		else
-			redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
-			return count
-		end`,
-	)
-
-	result, err := script.Run(ctx, rl.client, []string{redisKey}, int(rl.ttl.Seconds())).Result()
+	result, err := releaseScript.Run(ctx, rl.client, []string{redisKey}, int(rl.ttl.Seconds())).Result()
 	if err != nil {
 		log.Printf("[RedisLimiter] 执行Lua脚本失败: %v", err)
 		return
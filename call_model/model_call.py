@@ -1,12 +1,157 @@
 import sys
 import os
+import json
+import time
+import asyncio
+import threading
+import aiohttp
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from typing import Any, List, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 未安装时回退到标准库 json
+    orjson = None
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from config import get_web_config, get_redis_config
 
+# 模块级共享会话：复用到后端代理的TCP连接，避免每次调用重新建立连接
+# 连接池大小需覆盖 run_in_executor 线程池的并发调用数
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=0))
+_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=0))
+
+# 后端代理熔断器：连续 _BREAKER_THRESHOLD 次连接失败或5xx后熔断 _BREAKER_COOLDOWN 秒，
+# 期间调用直接失败，不再每次等待完整的请求超时；冷却结束后放行一个探测请求（half_open），成功则恢复
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 30.0
+_BREAKER_OPEN_MESSAGE = "代理调用失败: 后端代理不可用（熔断中）"
+_breaker = {'state': 'closed', 'failures': 0, 'opened_at': 0.0}
+_breaker_lock = threading.Lock()
+
+
+def _breaker_allow() -> bool:
+    """熔断器是否放行本次调用"""
+    with _breaker_lock:
+        if _breaker['state'] == 'closed':
+            return True
+        if _breaker['state'] == 'open' and time.monotonic() - _breaker['opened_at'] >= _BREAKER_COOLDOWN:
+            _breaker['state'] = 'half_open'
+            return True
+        return False
+
+
+def _breaker_record(backend_ok: bool) -> None:
+    """记录一次放行调用的结果（backend_ok 为 False 表示连接失败或后端5xx）"""
+    with _breaker_lock:
+        if backend_ok:
+            _breaker['state'] = 'closed'
+            _breaker['failures'] = 0
+            return
+        _breaker['failures'] += 1
+        if _breaker['state'] == 'half_open' or _breaker['failures'] >= _BREAKER_THRESHOLD:
+            if _breaker['state'] != 'open':
+                print(f"⚠️  后端代理连续失败 {_breaker['failures']} 次，熔断 {_BREAKER_COOLDOWN:.0f} 秒")
+            _breaker['state'] = 'open'
+            _breaker['opened_at'] = time.monotonic()
+
+
+# 异步调用共享的 aiohttp 会话，按事件循环懒创建（aiohttp 会话不能跨事件循环使用）
+_async_session: Optional[aiohttp.ClientSession] = None
+_async_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+# 代理地址、请求头等只在配置变化时重新计算
+# (web_config, redis_config, backend_url, headers, max_wait_time)，前两项用于判断配置视图是否已更新
+_proxy_base: Optional[Tuple[Dict[str, Any], Dict[str, Any], str, Dict[str, str], int]] = None
+
+
+def _dumps(obj: Any) -> bytes:
+    """序列化请求体，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """解析响应体，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _get_async_session() -> aiohttp.ClientSession:
+    """获取当前事件循环的共享 aiohttp 会话"""
+    global _async_session, _async_session_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_session is None or _async_session.closed or _async_session_loop is not loop:
+        # 连接数上限覆盖任务的最大并发数，实际并发由后端 Redis 限流控制
+        _async_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=256))
+        _async_session_loop = loop
+    return _async_session
+
+
+async def close_async_session() -> None:
+    """关闭共享的 aiohttp 会话（事件循环结束前调用）"""
+    global _async_session, _async_session_loop
+
+    if _async_session is not None and not _async_session.closed:
+        await _async_session.close()
+    _async_session = None
+    _async_session_loop = None
+
+
+def _get_proxy_settings(timeout: int, retry_times: int) -> Tuple[str, int, Dict[str, str]]:
+    """
+    获取后端代理地址、请求超时时间和请求头
+
+    Args:
+        timeout: 单次模型调用超时时间（秒）
+        retry_times: 重试次数
+
+    Returns:
+        (backend_url, request_timeout, headers)，headers 为共享对象，调用方不应修改
+    """
+    global _proxy_base
+
+    # 从统一配置模块读取后端配置（带缓存，配置文件未变化时返回同一对象）
+    web_config = get_web_config()
+    redis_config = get_redis_config()
+
+    if _proxy_base is None or _proxy_base[0] is not web_config or _proxy_base[1] is not redis_config:
+        backend_host = web_config['host']
+        backend_port = web_config['port']
+
+        # 如果host是0.0.0.0，使用localhost
+        if backend_host == '0.0.0.0':
+            backend_host = 'localhost'
+
+        # 获取内部API密钥
+        internal_api_key = os.getenv("INTERNAL_API_KEY", "gen-internal-api-key-2024")
+
+        _proxy_base = (
+            web_config,
+            redis_config,
+            f"http://{backend_host}:{backend_port}/api/model-call",
+            {
+                "Content-Type": "application/json",
+                "X-Internal-API-Key": internal_api_key
+            },
+            redis_config['max_wait_time'],
+        )
+
+    _, _, backend_url, headers, max_wait_time = _proxy_base
+
+    # 计算请求超时时间：每次尝试都会重新排队获取槽位，(max_wait_time + timeout) * 尝试次数 + 重试退避 + 缓冲
+    attempts = max(retry_times, 1)
+    request_timeout = (max_wait_time + timeout) * attempts + 10 * (attempts - 1) + 60  # 添加60秒缓冲
+
+    return backend_url, request_timeout, headers
+
 
 def call_model_via_proxy(
     api_url: str,
@@ -24,18 +169,7 @@ def call_model_via_proxy(
     """
     通过后端代理调用模型API（带流量控制）
     """
-    # 从统一配置模块读取后端配置
-    web_config = get_web_config()
-    redis_config = get_redis_config()
-
-    backend_host = web_config['host']
-    backend_port = web_config['port']
-
-    # 如果host是0.0.0.0，使用localhost
-    if backend_host == '0.0.0.0':
-        backend_host = 'localhost'
-
-    backend_url = f"http://{backend_host}:{backend_port}/api/model-call"
+    backend_url, request_timeout, headers = _get_proxy_settings(timeout, retry_times)
 
     payload = {
         "api_url": api_url,
@@ -51,36 +185,97 @@ def call_model_via_proxy(
         "task_id": task_id
     }
 
-    # 计算请求超时时间：max_wait_time + 实际调用timeout + 缓冲
-    max_wait_time = redis_config['max_wait_time']
-    request_timeout = max_wait_time + timeout + 60  # 添加60秒缓冲
-
-    # 获取内部API密钥
-    import os
-    internal_api_key = os.getenv("INTERNAL_API_KEY", "gen-internal-api-key-2024")
+    if not _breaker_allow():
+        return _BREAKER_OPEN_MESSAGE
 
+    backend_ok = True
     try:
-        response = requests.post(
+        response = _session.post(
             backend_url,
-            json=payload,
+            data=_dumps(payload),
             timeout=request_timeout,
-            headers={
-                "Content-Type": "application/json",
-                "X-Internal-API-Key": internal_api_key
-            }
+            headers=headers
         )
+        backend_ok = response.status_code < 500
         response.raise_for_status()
 
-        result = response.json()
+        result = _loads(response.content)
         if result.get("success"):
             return result.get("content", "")
         else:
             return f"模型调用失败: {result.get('error', '未知错误')}"
 
     except requests.exceptions.ConnectionError as e:
+        backend_ok = False
+        return f"后端代理不可用: {str(e)}"
+    except Exception as e:
+        return f"代理调用失败: {str(e)}"
+    finally:
+        _breaker_record(backend_ok)
+
+
+async def call_model_via_proxy_async(
+    api_url: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float = 0.0,
+    max_tokens: int = 8192,
+    timeout: int = 300,
+    is_vllm: bool = False,
+    top_p: float = 1.0,
+    retry_times: int = 3,
+    task_id: str = "",
+) -> str:
+    """
+    通过后端代理异步调用模型API（带流量控制）
+
+    与 call_model_via_proxy 返回值一致，但不占用线程：等待期间只挂起协程，
+    同一进程可同时发起数百个调用，不受默认线程池大小限制
+    """
+    backend_url, request_timeout, headers = _get_proxy_settings(timeout, retry_times)
+
+    payload = {
+        "api_url": api_url,
+        "api_key": api_key,
+        "messages": messages,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "timeout": timeout,
+        "is_vllm": is_vllm,
+        "top_p": top_p,
+        "retry_times": retry_times,
+        "task_id": task_id
+    }
+
+    if not _breaker_allow():
+        return _BREAKER_OPEN_MESSAGE
+
+    backend_ok = True
+    try:
+        async with _get_async_session().post(
+            backend_url,
+            data=_dumps(payload),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=request_timeout)
+        ) as response:
+            backend_ok = response.status < 500
+            response.raise_for_status()
+            result = _loads(await response.read())
+
+        if result.get("success"):
+            return result.get("content", "")
+        else:
+            return f"模型调用失败: {result.get('error', '未知错误')}"
+
+    except aiohttp.ClientConnectionError as e:
+        backend_ok = False
         return f"后端代理不可用: {str(e)}"
     except Exception as e:
         return f"代理调用失败: {str(e)}"
+    finally:
+        _breaker_record(backend_ok)
 
 
 def call_model_api(
@@ -4,38 +4,112 @@
 import os
 import yaml
 import secrets
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+# 优先使用 libyaml 的 C 实现解析配置，未安装时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    print("⚠️  未检测到 libyaml，使用纯 Python 的 YAML 解析器加载配置")
 
 # 配置文件路径
 CONFIG_PATH = Path(__file__).parent / "config.yaml"
+_CONFIG_FILE = os.fspath(CONFIG_PATH)  # 预先转换为字符串，stat 时不再经过 Path 转换
 
 # 缓存配置
 _config_cache: Optional[Dict[str, Any]] = None
 
+# 配置文件不存在或为空时共享的空配置
+_EMPTY_CONFIG: Dict[str, Any] = {}
+
+# 按完整点号路径展开的配置（包含中间节点），get_config 只需一次字典查找
+_flat_config: Dict[str, Any] = {}
+
+# 缓存对应的配置文件签名 (st_mtime_ns, st_size, st_ino)，文件不存在时为 None
+_config_signature: Optional[Tuple[int, int, int]] = None
+_config_lock = threading.Lock()
+
+# 配置文件变化检查间隔（秒）：间隔内的读取直接使用缓存，连 stat 也省去
+_CONFIG_CHECK_INTERVAL = 1.0
+_config_checked_at = 0.0
+
+# 便捷配置访问函数的结果缓存（重新加载配置时清空）
+_view_cache: Dict[str, Dict[str, Any]] = {}
+
+# 配置为空时自动生成的随机密钥，进程内只生成一次（重新加载配置也保持不变）
+_generated_secrets: Dict[str, str] = {}
+
+
+def _config_file_signature() -> Optional[Tuple[int, int, int]]:
+    """获取配置文件签名，文件不存在时返回 None"""
+    try:
+        st = os.stat(_CONFIG_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _flatten_config(prefix: str, node: Dict[str, Any], flat: Dict[str, Any]) -> None:
+    """将嵌套配置展开为 {"server.port": 18080, "server": {...}, ...}"""
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        flat[path] = value
+        if isinstance(value, dict):
+            _flatten_config(path, value, flat)
+
 
 def load_config(force_reload: bool = False) -> Dict[str, Any]:
     """
     加载配置文件（带缓存）
     
+    每 _CONFIG_CHECK_INTERVAL 秒最多 stat 一次配置文件，修改时间、大小或 inode 变化时自动重新加载，
+    长时间运行的进程无需重启即可读到修改后的配置。
+    
     Args:
         force_reload: 是否强制重新加载
         
     Returns:
         配置字典
     """
-    global _config_cache
+    global _config_cache, _config_signature, _flat_config, _config_checked_at
     
-    if _config_cache is not None and not force_reload:
-        return _config_cache
+    # 快速路径不加锁：读取模块级引用在 CPython 中是原子的，只读一次避免两次读取之间被替换
+    cached = _config_cache
+    now = time.monotonic()
+    if cached is not None and not force_reload and now - _config_checked_at < _CONFIG_CHECK_INTERVAL:
+        return cached
     
-    if CONFIG_PATH.exists():
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            _config_cache = yaml.safe_load(f) or {}
-    else:
-        _config_cache = {}
+    signature = _config_file_signature()
+    _config_checked_at = now
+    if cached is not None and not force_reload and signature == _config_signature:
+        return cached
     
-    return _config_cache
+    with _config_lock:
+        # 双重检查：其他线程可能已经完成了重新加载
+        cached = _config_cache
+        if cached is not None and not force_reload and signature == _config_signature:
+            return cached
+        
+        config = _EMPTY_CONFIG
+        if signature is not None:
+            # 以字节读取，由 libyaml 直接解码
+            with open(_CONFIG_FILE, 'rb') as f:
+                config = yaml.load(f, Loader=_SafeLoader) or _EMPTY_CONFIG
+        
+        flat: Dict[str, Any] = {}
+        if isinstance(config, dict):
+            _flatten_config("", config, flat)
+        
+        _view_cache.clear()
+        _flat_config = flat
+        _config_cache = config
+        _config_signature = signature
+    
+    return config
 
 
 def get_config(key_path: str, default: Any = None) -> Any:
@@ -53,55 +127,68 @@ def get_config(key_path: str, default: Any = None) -> Any:
         get_config("server.port", 18080)
         get_config("jwt.secret_key", "")
     """
-    config = load_config()
-    keys = key_path.split('.')
-    value = config
-    
-    for key in keys:
-        if isinstance(value, dict) and key in value:
-            value = value[key]
-        else:
-            return default
-    
+    load_config()
+    value = _flat_config.get(key_path)
     return value if value is not None else default
 
 
 # ==================== 便捷配置访问函数 ====================
 
+def _cached_view(name: str, builder) -> Dict[str, Any]:
+    """
+    获取缓存的配置视图，不存在时调用 builder 构建
+    
+    模型调用等热路径每次都会读取配置，缓存后只需一次时间比较和字典查找。
+    返回的字典为共享对象，调用方不应修改。
+    """
+    load_config()  # 配置文件变化时会清空视图缓存
+    view = _view_cache.get(name)
+    if view is None:
+        view = builder()
+        _view_cache[name] = view
+    return view
+
+
 def get_web_config() -> Dict[str, Any]:
     """获取 Web 服务配置"""
-    return {
+    return _cached_view('web', lambda: {
         'host': get_config('server.host', '0.0.0.0'),
         'port': get_config('server.port', 18080),
         'production_mode': get_config('server.production_mode', False),
-    }
+    })
 
 
 def get_frontend_url() -> str:
     """获取前端 URL"""
-    return get_config('frontend.url', 'http://localhost:13000')
+    return _cached_view('frontend', lambda: {
+        'url': get_config('frontend.url', 'http://localhost:13000'),
+    })['url']
 
 
 def get_cors_config() -> Dict[str, Any]:
     """获取 CORS 配置"""
-    return {
+    return _cached_view('cors', lambda: {
         'origins': get_config('cors.origins', ['http://localhost:13000']),
         'allow_credentials': get_config('cors.allow_credentials', True),
         'allow_methods': get_config('cors.allow_methods', ['*']),
         'allow_headers': get_config('cors.allow_headers', ['*']),
-    }
+    })
 
 
-def get_jwt_config() -> Dict[str, Any]:
-    """
-    获取 JWT 配置
-    如果 secret_key 为空，则生成随机密钥并警告
-    """
+def _generated_secret(key_path: str, nbytes: int) -> str:
+    """获取为配置项自动生成的随机值（同一进程内只生成一次）"""
+    value = _generated_secrets.get(key_path)
+    if value is None:
+        value = _generated_secrets.setdefault(key_path, secrets.token_urlsafe(nbytes))
+    return value
+
+
+def _build_jwt_config() -> Dict[str, Any]:
     secret_key = get_config('jwt.secret_key', '')
     generated = False
     
     if not secret_key:
-        secret_key = secrets.token_urlsafe(32)
+        secret_key = _generated_secret('jwt.secret_key', 32)
         generated = True
     
     return {
@@ -112,53 +199,66 @@ def get_jwt_config() -> Dict[str, Any]:
     }
 
 
-def get_admin_config() -> Dict[str, Any]:
+def get_jwt_config() -> Dict[str, Any]:
     """
-    获取管理员配置
-    如果密码为空，则生成随机密码
+    获取 JWT 配置
+    如果 secret_key 为空，则生成随机密钥并警告（进程内保持同一个密钥）
     """
+    return _cached_view('jwt', _build_jwt_config)
+
+
+def _build_admin_config() -> Dict[str, Any]:
     password = get_config('admin.password', '')
     generated = False
     
     if not password:
-        password = secrets.token_urlsafe(12)
+        password = _generated_secret('admin.password', 12)
         generated = True
     
     return {
         'username': get_config('admin.username', 'admin'),
         'password': password,
         'generated': generated,  # 标记是否自动生成
+        'bcrypt_rounds': int(get_config('admin.bcrypt_rounds', 10)),
     }
 
 
+def get_admin_config() -> Dict[str, Any]:
+    """
+    获取管理员配置
+    如果密码为空，则生成随机密码（进程内保持同一个密码）
+    """
+    return _cached_view('admin', _build_admin_config)
+
+
 def get_redis_config() -> Dict[str, Any]:
     """获取 Redis 配置"""
-    return {
+    return _cached_view('redis', lambda: {
         'host': get_config('redis_service.host', 'localhost'),
         'port': get_config('redis_service.port', 16379),
         'db': get_config('redis_service.db', 0),
         'password': get_config('redis_service.password', None),
         'max_wait_time': get_config('redis_service.max_wait_time', 300),
         'default_max_concurrency': get_config('redis_service.default_max_concurrency', 16),
-    }
+    })
 
 
 def get_model_services_config() -> Dict[str, Any]:
     """获取默认模型服务配置"""
-    return {
+    return _cached_view('model_services', lambda: {
         'default_services': get_config('model_services.default_services', ['http://localhost:16466/v1']),
         'default_model': get_config('model_services.default_model', '/data/models/Qwen3-32B'),
         'default_api_key': get_config('model_services.default_api_key', ''),
-    }
+    })
 
 
 def get_default_services() -> List[str]:
     """获取默认服务地址列表"""
-    return get_config('model_services.default_services', ['http://localhost:16466/v1'])
+    return get_model_services_config()['default_services']
 
 
 def get_default_model() -> str:
     """获取默认模型路径"""
-    return get_config('model_services.default_model', '/data/models/Qwen3-32B')
+    return get_model_services_config()['default_model']
 
 
@@ -4,13 +4,20 @@
 包含可替换的提示构建函数和规则评分函数
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional, Sequence
 import json
 import random
+import string
 import threading
+import time
 from .prompt_config import *
 import re
 
+try:
+    import orjson
+except ImportError:  # orjson 未安装时回退到标准库 json
+    orjson = None
+
 # 线程局部随机数生成器，避免多线程共享全局随机状态
 _thread_local = threading.local()
 
@@ -20,13 +27,91 @@ def _get_thread_random() -> random.Random:
     获取线程局部的随机数生成器
     每个线程拥有独立的 Random 实例，避免多线程竞争
     """
-    if not hasattr(_thread_local, 'rng'):
-        # 为每个线程创建独立的 Random 实例
-        _thread_local.rng = random.Random()
-    return _thread_local.rng
+    rng = getattr(_thread_local, 'rng', None)
+    if rng is None:
+        # 用单调时钟和线程ID做种子，省去默认从 os.urandom 读取 2500 字节的系统调用；
+        # 这里只用于挑选方向和生成示例数据，不需要密码学强度的随机性
+        rng = _thread_local.rng = random.Random(time.monotonic_ns() ^ threading.get_ident())
+    return rng
+
+
+def _dumps_indented(obj: Any) -> str:
+    """
+    以缩进格式序列化为JSON字符串（不转义非ASCII字符）
+    
+    优先使用 orjson（仅支持2空格缩进），标准库回退时保持相同的缩进，保证提示词一致
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # 超出 orjson 支持范围的类型（如超大整数），交给标准库处理
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def _compile_template(template: str) -> Callable[..., str]:
+    """
+    预编译 str.format 模板，返回只做拼接的渲染函数
+    
+    模板在导入时解析一次，拆分为字面量片段和字段名，渲染时不再重复解析 {…} 占位符。
+    含格式说明、转换符或属性/下标访问的字段不做预编译，直接回退到 str.format。
+    """
+    parts = []
+    fields = []  # (parts 中的位置, 字段名)
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        if literal:
+            parts.append(literal)
+        if field_name is None:
+            continue
+        if format_spec or conversion or not field_name.isidentifier():
+            return template.format
+        fields.append((len(parts), field_name))
+        parts.append('')
+
+    def render(**kwargs: Any) -> str:
+        segments = parts.copy()
+        for index, name in fields:
+            segments[index] = str(kwargs[name])
+        return ''.join(segments)
+
+    return render
+
+
+# 预编译的提示词模板
+_render_command_prompt = _compile_template(command_prompt)
+_render_judge_prompt = _compile_template(judge_prompt)
+_render_filter_prompt = _compile_template(filter_prompt)
+
+
+# 默认生成方向
+_DEFAULT_DIRECTIONS = ('信用卡年费', ' 股票爆仓', ' 基金赎回')
+
+
+def _pick_directions(rng: random.Random, directions: Sequence[str], num_variants: int) -> list:
+    """
+    随机选取 min(num_variants, len(directions)) 个不重复的生成方向
+    
+    只有一个方向（计算类任务每次都是单个方向）或全部选取时不经过 random.sample 的取样池
+    """
+    count = len(directions)
+    if num_variants < count:
+        return rng.sample(directions, max(num_variants, 0))
+    if count <= 1:
+        return list(directions)
+    picked = list(directions)
+    rng.shuffle(picked)
+    return picked
+
 
+def _get_meta_description(sample_data: Dict[str, Any]) -> str:
+    """获取样本的任务描述，meta 缺失或为空时返回空字符串（不创建临时字典）"""
+    meta = sample_data.get('meta')
+    if not meta:
+        return ''
+    return meta.get('meta_description', '')
 
-def build_generation_prompt(sample_data: Dict[str, Any], num_variants: int = 1, special: str = "", directions: list = ['信用卡年费', ' 股票爆仓', ' 基金赎回']) -> str:
+
+def build_generation_prompt(sample_data: Dict[str, Any], num_variants: int = 1, special: str = "", directions: Optional[Sequence[str]] = None) -> str:
     """
     构建数据生成提示词
     
@@ -37,20 +122,21 @@ def build_generation_prompt(sample_data: Dict[str, Any], num_variants: int = 1,
     Returns:
         str: 生成提示词
     """
-    meta = sample_data.get('meta', {})
     turns = sample_data.get('turns', [])
     
     # 获取任务描述
-    meta_description = meta.get('meta_description', '')
+    meta_description = _get_meta_description(sample_data)
     
-    conversation_str = json.dumps(turns, ensure_ascii=False, indent=4)
+    conversation_str = _dumps_indented(turns)
+
+    if directions is None:
+        directions = _DEFAULT_DIRECTIONS
 
     # 使用线程局部随机数生成器，避免多线程竞争
-    thread_rng = _get_thread_random()
-    direction = thread_rng.sample(directions, min(num_variants, len(directions)))
+    direction = _pick_directions(_get_thread_random(), directions, num_variants)
 
     # 构建生成提示词
-    prompt = command_prompt.format(num_variants=num_variants, meta_description=meta_description, conversation_str=conversation_str, direction=direction, special=special)
+    prompt = _render_command_prompt(num_variants=num_variants, meta_description=meta_description, conversation_str=conversation_str, direction=direction, special=special)
 
     # print(prompt)
     # import time
@@ -69,28 +155,27 @@ def build_evaluation_prompt(sample_data: Dict[str, Any], generated_data: Dict[st
     Returns:
         str: 评估提示词
     """
-    meta = sample_data.get('meta', {})
-    meta_description = meta.get('meta_description', '')
+    meta_description = _get_meta_description(sample_data)
     
     # 获取生成的对话
-    generated_turns = generated_data.get('turns', [])
-    conversation = []
-    for turn in generated_turns:
-        role = turn.get('role', '')
-        text = turn.get('text', '')
-        conversation.append(f"{role}: {text}")
-    
-    conversation_str = '\n'.join(conversation)
+    conversation_str = '\n'.join(
+        f"{turn.get('role', '')}: {turn.get('text', '')}"
+        for turn in generated_data.get('turns', ())
+    )
     
     if special != "":
         special = "本数据集有以下特殊规则\n" + special
     
     # 构建评估提示词
-    prompt = judge_prompt.format(meta_description=meta_description, conversation_str=conversation_str, special=special)
+    prompt = _render_judge_prompt(meta_description=meta_description, conversation_str=conversation_str, special=special)
 
     return prompt
 
 
+# 实体识别结果中不允许出现的时间单位
+_ENTITY_TIME_UNITS = ("YYYY", "HH", "时", "分", "秒", "MM", "DD", "SS")
+
+
 def _evaluate_entity_format(answer: str) -> int:
     """评估实体识别任务的格式"""
     score = 0
@@ -134,15 +219,15 @@ def _evaluate_entity_format(answer: str) -> int:
             if any(len(content) != base_length for content in answer_list):
                 print("列表内长度不一致")
                 return 0
-            prohibit = ["YYYY", "HH", "时", "分", "秒", "MM", "DD", "SS"]
-            if any(pro in str(answer_list[3]) for pro in prohibit):
+            slot_text = str(answer_list[3])
+            if any(unit in slot_text for unit in _ENTITY_TIME_UNITS):
                 print("时间单位不应该存在")
                 return 0
-            for i in range(len(answer_list[2])):
-                if "|" in answer_list[2][i] and "|" not in answer_list[3][i]:
+            for source, normalized in zip(answer_list[2], answer_list[3]):
+                if "|" in source and "|" not in normalized:
                     print("|缺失")
                     return 0
-                if "&" in answer_list[2][i] and "&" not in answer_list[3][i]:
+                if "&" in source and "&" not in normalized:
                     print("&缺失")
                     return 0
             
@@ -154,25 +239,33 @@ def _evaluate_entity_format(answer: str) -> int:
         return 0  # 包含换行符直接返回0分
     return score  # 满分10分
 
+# 多余的解释性文字
+_BAD_PHRASES = ('以上是', '根据', '分析如下', '总结')
+
+
 def _evaluate_general_format(answer: str) -> int:
     """通用格式评估"""
     score = 10  # 默认满分
     
     # 检查是否为空
-    if not answer.strip():
+    answer_stripped = answer.strip()
+    if not answer_stripped:
         return 0
     
     # 检查是否有多余的解释性文字
-    if any(phrase in answer.lower() for phrase in ['以上是', '根据', '分析如下', '总结']):
+    answer_lower = answer.lower()
+    if any(phrase in answer_lower for phrase in _BAD_PHRASES):
         score -= 2
     
     # 检查开头和结尾是否包含字典/列表的符号
-    answer_stripped = answer.strip()
-    if ((answer_stripped.startswith('{') and answer_stripped.endswith('}')) or
-        (answer_stripped.startswith('[') and answer_stripped.endswith(']'))):
+    if ((answer_stripped[0] == '{' and answer_stripped[-1] == '}') or
+        (answer_stripped[0] == '[' and answer_stripped[-1] == ']')):
         # 尝试直接解析整个内容
         try:
-            json.loads(answer_stripped)
+            if orjson is not None:
+                orjson.loads(answer_stripped)
+            else:
+                json.loads(answer_stripped)
         except:
             print(f"解析失败: {answer_stripped}")
             score -= 5  # 开头结尾符合格式但解析失败扣分
@@ -188,8 +281,12 @@ def _evaluate_question_rewrite_format(answer: str) -> int:
         return 0
 
 def  build_filter_prompt(content: str) -> str:
+    # 空内容无需评估，直接返回空提示词
+    if not content or not content.strip():
+        return ""
+
     # 构建评估提示词
-    prompt = filter_prompt.format(data=content)
+    prompt = _render_filter_prompt(data=content)
 
     return prompt
 
@@ -203,10 +300,10 @@ PROMPT_BUILDERS = {
 
 # 规则函数判定注册
 FORMAT_EVALUATORS = {
-    'entity_extraction': lambda text: _evaluate_entity_format(text),
-    'general': lambda text: _evaluate_general_format(text),
-    'question_rewrite': lambda text: _evaluate_question_rewrite_format(text),
-    'calculation' : lambda text: _evaluate_general_format(text)
+    'entity_extraction': _evaluate_entity_format,
+    'general': _evaluate_general_format,
+    'question_rewrite': _evaluate_question_rewrite_format,
+    'calculation': _evaluate_general_format,
 }
 
 
@@ -1,10 +1,11 @@
 """
 数据库模块
 """
-from .models import Base, User, ModelConfig, Task, DataFile, GeneratedData, engine, SessionLocal, get_db, init_db, verify_and_create_columns
+from .models import Base, User, ModelConfig, Task, DataFile, GeneratedData, engine, SessionLocal, ScopedSession, session_scope, get_db, init_db, verify_and_create_columns
 from .user_service import (
     authenticate_user,
     get_user_by_username,
+    get_user_with_relations,
     create_user,
     get_password_hash,
     verify_password,
@@ -15,6 +16,7 @@ from .generated_data_service import (
     save_generated_data,
     save_batch_generated_data,
     get_generated_data_by_task,
+    iter_generated_data_by_task,
     get_generated_data_count,
     delete_generated_data_by_task
 )
@@ -28,11 +30,14 @@ __all__ = [
     'GeneratedData',
     'engine',
     'SessionLocal',
+    'ScopedSession',
+    'session_scope',
     'get_db',
     'init_db',
     'verify_and_create_columns',
     'authenticate_user',
     'get_user_by_username',
+    'get_user_with_relations',
     'create_user',
     'get_password_hash',
     'verify_password',
@@ -41,6 +46,7 @@ __all__ = [
     'save_generated_data',
     'save_batch_generated_data',
     'get_generated_data_by_task',
+    'iter_generated_data_by_task',
     'get_generated_data_count',
     'delete_generated_data_by_task'
 ]
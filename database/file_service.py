@@ -4,9 +4,15 @@
 提供文件的创建、查询、删除等操作
 """
 
+from sqlalchemy import Integer, cast, func
 from sqlalchemy.orm import Session
 from .models import DataFile, User
-from typing import Optional, List
+from typing import Optional, List, Iterator
+
+
+def _escape_glob(text: str) -> str:
+    """转义 GLOB 通配符，使其按字面匹配"""
+    return ''.join(f"[{ch}]" if ch in '*?[' else ch for ch in text)
 
 
 def create_data_file(
@@ -30,24 +36,33 @@ def create_data_file(
         DataFile: 创建的文件对象
     """
     # 检查是否已有同名文件，如果有则添加序号
-    existing_files = db.query(DataFile).filter(
+    # 使用 (user_id, filename) 索引做精确匹配，且只查询ID列，不加载文件内容
+    exists = db.query(DataFile.id).filter(
         DataFile.user_id == user_id,
-        DataFile.filename.like(f"{filename.rsplit('.', 1)[0]}%")
-    ).all()
+        DataFile.filename == filename
+    ).first()
     
     final_filename = filename
-    if existing_files:
+    if exists is not None:
         base_name = filename.rsplit('.', 1)[0]
         extension = filename.rsplit('.', 1)[1] if '.' in filename else ''
-        counter = 1
+        suffix = f".{extension}" if extension else ''
         
-        existing_names = {f.filename for f in existing_files}
-        while final_filename in existing_names:
-            if extension:
-                final_filename = f"{base_name}_{counter}.{extension}"
-            else:
-                final_filename = f"{base_name}_{counter}"
-            counter += 1
+        # 一条查询取出已有 "base_N.ext" 中最大的序号 N，新序号取 N + 1
+        counter_expr = cast(
+            func.substr(
+                DataFile.filename,
+                len(base_name) + 2,
+                func.length(DataFile.filename) - len(base_name) - 1 - len(suffix)
+            ),
+            Integer
+        )
+        max_counter = db.query(func.max(counter_expr)).filter(
+            DataFile.user_id == user_id,
+            DataFile.filename.op('GLOB')(f"{_escape_glob(base_name)}_*{_escape_glob(suffix)}")
+        ).scalar()
+        
+        final_filename = f"{base_name}_{(max_counter or 0) + 1}{suffix}"
     
     # 创建文件记录
     data_file = DataFile(
@@ -111,13 +126,13 @@ def delete_data_file(db: Session, file_id: int, user_id: int) -> bool:
     Returns:
         bool: 删除成功返回True，文件不存在或不属于该用户返回False
     """
-    data_file = get_data_file_by_id(db, file_id, user_id)
-    if not data_file:
-        return False
-    
-    db.delete(data_file)
+    # 直接按ID和用户过滤删除，通过影响行数判断文件是否存在
+    deleted = db.query(DataFile).filter(
+        DataFile.id == file_id,
+        DataFile.user_id == user_id
+    ).delete(synchronize_session=False)
     db.commit()
-    return True
+    return deleted > 0
 
 
 def delete_data_files_batch(db: Session, file_ids: List[int], user_id: int) -> tuple[int, List[str]]:
@@ -132,19 +147,31 @@ def delete_data_files_batch(db: Session, file_ids: List[int], user_id: int) -> t
     Returns:
         tuple: (成功删除的数量, 错误列表)
     """
-    deleted_count = 0
-    errors = []
+    if not file_ids:
+        return 0, []
     
-    for file_id in file_ids:
-        try:
-            if delete_data_file(db, file_id, user_id):
-                deleted_count += 1
-            else:
-                errors.append(f"文件ID {file_id}: 文件不存在或无权删除")
-        except Exception as e:
-            errors.append(f"文件ID {file_id}: {str(e)}")
+    query = db.query(DataFile).filter(
+        DataFile.user_id == user_id,
+        DataFile.id.in_(file_ids)
+    )
     
-    return deleted_count, errors
+    try:
+        # 一次查询找出属于该用户的文件ID，再用一条 DELETE 批量删除
+        found_ids = {row.id for row in query.with_entities(DataFile.id)}
+        if found_ids:
+            query.delete(synchronize_session=False)
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        return 0, [f"文件ID {file_id}: {str(e)}" for file_id in file_ids]
+    
+    errors = [
+        f"文件ID {file_id}: 文件不存在或无权删除"
+        for file_id in file_ids
+        if file_id not in found_ids
+    ]
+    
+    return len(found_ids), errors
 
 
 def get_file_content(db: Session, file_id: int, user_id: int) -> Optional[bytes]:
@@ -159,8 +186,56 @@ def get_file_content(db: Session, file_id: int, user_id: int) -> Optional[bytes]
     Returns:
         bytes: 文件内容，如果文件不存在或不属于该用户则返回None
     """
-    data_file = get_data_file_by_id(db, file_id, user_id)
-    if not data_file:
+    # 只查询文件内容列，不构造 ORM 对象
+    return db.query(DataFile.file_content).filter(
+        DataFile.id == file_id,
+        DataFile.user_id == user_id
+    ).scalar()
+
+
+def iter_file_content(
+    db: Session,
+    file_id: int,
+    user_id: int,
+    chunk_size: int = 1 << 20
+) -> Optional[Iterator[bytes]]:
+    """
+    按块流式读取文件内容，避免一次性加载整个文件
+    
+    Args:
+        db: 数据库会话
+        file_id: 文件ID
+        user_id: 用户ID
+        chunk_size: 每块字节数（默认1MB）
+        
+    Returns:
+        Iterator[bytes]: 文件内容块迭代器，如果文件不存在或不属于该用户则返回None
+    """
+    exists = db.query(DataFile.id).filter(
+        DataFile.id == file_id,
+        DataFile.user_id == user_id
+    ).first()
+    if exists is None:
         return None
     
-    return data_file.file_content
+    return _read_file_content_chunks(db, file_id, chunk_size)
+
+
+def _read_file_content_chunks(db: Session, file_id: int, chunk_size: int) -> Iterator[bytes]:
+    """通过 SQLite 增量 BLOB 接口分块读取文件内容"""
+    dbapi_connection = db.connection().connection.dbapi_connection
+    
+    if not hasattr(dbapi_connection, 'blobopen'):
+        # Python 3.11 以下的 sqlite3 不支持增量读取，退回整体读取
+        content = db.query(DataFile.file_content).filter(DataFile.id == file_id).scalar()
+        if content:
+            yield content
+        return
+    
+    # data_files.id 是 INTEGER PRIMARY KEY，即 SQLite 的 rowid
+    with dbapi_connection.blobopen('data_files', 'file_content', file_id, readonly=True) as blob:
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -1,11 +1,42 @@
 """
 生成数据服务 - 处理模型生成数据的数据库操作
 """
+from sqlalchemy import insert, func, case
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 import json
+import re
 from datetime import datetime
-from .models import GeneratedData, SessionLocal
+from .models import GeneratedData, session_scope
+
+try:
+    import orjson
+except ImportError:  # orjson 未安装时回退到标准库 json
+    orjson = None
+
+# 批量写入使用的 INSERT 语句，模块加载时构造一次，配合编译缓存重复使用
+_INSERT_GENERATED_DATA = insert(GeneratedData)
+
+
+# 连续20位及以上的数字可能超出64位整数范围，orjson 会将其解析为 float 而丢失精度
+_LONG_DIGITS = re.compile(r'\d{20}')
+
+
+def _dumps(obj: Any) -> str:
+    """序列化数据内容为JSON字符串，优先使用 orjson"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # 超出 orjson 支持范围的类型（如超大整数），交给标准库处理
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _loads(data: str) -> Any:
+    """解析数据内容，优先使用 orjson；含超长数字时使用标准库以保留整数精度"""
+    if orjson is not None and not _LONG_DIGITS.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def save_generated_data(
@@ -36,40 +67,39 @@ def save_generated_data(
     Returns:
         保存后的GeneratedData对象
     """
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
+    owns_session = db is None
     
-    try:
-        # 将数据内容转换为JSON字符串
-        content_json = json.dumps(data_content, ensure_ascii=False)
-        
-        # 创建数据记录
-        generated_data = GeneratedData(
-            task_id=task_id,
-            user_id=user_id,
-            data_content=content_json,
-            model_score=model_score,
-            rule_score=rule_score,
-            retry_count=retry_count,
-            generation_model=generation_model,
-            task_type=task_type,
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(generated_data)
-        db.commit()
-        db.refresh(generated_data)
+    with session_scope(db) as db:
+        try:
+            # 将数据内容转换为JSON字符串
+            content_json = _dumps(data_content)
+            
+            # 创建数据记录
+            generated_data = GeneratedData(
+                task_id=task_id,
+                user_id=user_id,
+                data_content=content_json,
+                model_score=model_score,
+                rule_score=rule_score,
+                retry_count=retry_count,
+                generation_model=generation_model,
+                task_type=task_type
+            )
+            
+            db.add(generated_data)
+            db.flush()
+            
+            # flush 后自增ID已回填，无需 refresh 再查询一次；
+            # 自建会话在提交前分离对象，避免提交后属性过期、会话关闭后无法访问
+            if owns_session:
+                db.expunge(generated_data)
+            db.commit()
+            
+            return generated_data
         
-        return generated_data
-    
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        if should_close:
-            db.close()
+        except Exception as e:
+            db.rollback()
+            raise e
 
 
 def save_batch_generated_data(
@@ -77,7 +107,8 @@ def save_batch_generated_data(
     user_id: int,
     data_list: List[Dict[str, Any]],
     generation_model: Optional[str] = None,
-    task_type: Optional[str] = None
+    task_type: Optional[str] = None,
+    db: Optional[Session] = None
 ) -> int:
     """
     批量保存生成数据到数据库
@@ -88,50 +119,83 @@ def save_batch_generated_data(
         data_list: 数据列表，每个元素是完整的数据字典
         generation_model: 生成模型名称
         task_type: 任务类型
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         成功保存的数据条数
     """
-    db = SessionLocal()
-    try:
-        saved_count = 0
-        
-        for data_item in data_list:
-            # 提取元数据
-            meta = data_item.get('meta', {})
-            model_score = meta.get('model_score')
-            rule_score = meta.get('rule_score')
-            retry_count = meta.get('retry_count', 0)
+    if not data_list:
+        return 0
+    
+    with session_scope(db) as db:
+        try:
+            now = datetime.utcnow()
+            rows = []
             
-            # 如果meta中没有model信息，使用传入的参数
-            gen_model = meta.get('generation_model') or generation_model
+            for data_item in data_list:
+                # 提取元数据
+                meta = data_item.get('meta', {})
+                
+                rows.append({
+                    'task_id': task_id,
+                    'user_id': user_id,
+                    'data_content': _dumps(data_item),
+                    'model_score': meta.get('model_score'),
+                    'rule_score': meta.get('rule_score'),
+                    'retry_count': meta.get('retry_count', 0),
+                    # 如果meta中没有model信息，使用传入的参数
+                    'generation_model': meta.get('generation_model') or generation_model,
+                    'task_type': task_type,
+                    'is_confirmed': False,
+                    'created_at': now,
+                    'updated_at': now
+                })
             
-            # 保存数据
-            save_generated_data(
-                task_id=task_id,
-                user_id=user_id,
-                data_content=data_item,
-                model_score=model_score,
-                rule_score=rule_score,
-                retry_count=retry_count,
-                generation_model=gen_model,
-                task_type=task_type,
-                db=db
-            )
-            saved_count += 1
+            # 单条 INSERT 语句批量写入，并在一个事务内提交
+            db.execute(_INSERT_GENERATED_DATA, rows)
+            db.commit()
+            
+            return len(rows)
         
-        return saved_count
+        except Exception as e:
+            db.rollback()
+            raise e
+
+
+def iter_generated_data_by_task(
+    task_id: str,
+    user_id: Optional[int] = None,
+    batch_size: int = 1000,
+    db: Optional[Session] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    根据任务ID逐条获取生成的数据（流式读取，适合大任务导出）
     
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+    Args:
+        task_id: 任务ID
+        user_id: 用户ID（可选，用于权限过滤）
+        batch_size: 每批从数据库读取的行数
+        db: 数据库会话（可选，如果不提供则自动创建）
+        
+    Yields:
+        生成数据字典
+    """
+    with session_scope(db) as db:
+        # 只查询数据内容列，跳过 ORM 对象构造
+        query = db.query(GeneratedData.data_content).filter(GeneratedData.task_id == task_id)
+        
+        if user_id is not None:
+            query = query.filter(GeneratedData.user_id == user_id)
+        
+        # 分批读取，边读取边解析，避免一次性加载全部行
+        for (data_content,) in query.execution_options(stream_results=True).yield_per(batch_size):
+            yield _loads(data_content)
 
 
 def get_generated_data_by_task(
     task_id: str,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    db: Optional[Session] = None
 ) -> List[Dict[str, Any]]:
     """
     根据任务ID获取生成的数据
@@ -139,34 +203,18 @@ def get_generated_data_by_task(
     Args:
         task_id: 任务ID
         user_id: 用户ID（可选，用于权限过滤）
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         生成数据列表
     """
-    db = SessionLocal()
-    try:
-        query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
-        
-        if user_id is not None:
-            query = query.filter(GeneratedData.user_id == user_id)
-        
-        results = query.all()
-        
-        # 转换为字典列表
-        data_list = []
-        for item in results:
-            data_dict = json.loads(item.data_content)
-            data_list.append(data_dict)
-        
-        return data_list
-    
-    finally:
-        db.close()
+    return list(iter_generated_data_by_task(task_id, user_id, db=db))
 
 
 def get_generated_data_with_ids(
     task_id: str,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    db: Optional[Session] = None
 ) -> List[Dict[str, Any]]:
     """
     根据任务ID获取生成的数据（包含ID，用于编辑）
@@ -174,12 +222,12 @@ def get_generated_data_with_ids(
     Args:
         task_id: 任务ID
         user_id: 用户ID（可选，用于权限过滤）
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         生成数据列表，每个元素包含 id 和 data 字段
     """
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
         
         if user_id is not None:
@@ -190,7 +238,7 @@ def get_generated_data_with_ids(
         # 转换为字典列表，包含ID和确认状态
         data_list = []
         for item in results:
-            data_dict = json.loads(item.data_content)
+            data_dict = _loads(item.data_content)
             data_list.append({
                 'id': item.id,
                 'data': data_dict,
@@ -200,15 +248,13 @@ def get_generated_data_with_ids(
             })
         
         return data_list
-    
-    finally:
-        db.close()
 
 
 def update_generated_data(
     data_id: int,
     user_id: int,
-    new_content: Dict[str, Any]
+    new_content: Dict[str, Any],
+    db: Optional[Session] = None
 ) -> bool:
     """
     更新单条生成数据
@@ -217,38 +263,37 @@ def update_generated_data(
         data_id: 数据ID
         user_id: 用户ID（用于权限验证）
         new_content: 新的数据内容
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         是否更新成功
     """
-    db = SessionLocal()
-    try:
-        # 查找数据并验证权限
-        data_item = db.query(GeneratedData).filter(
-            GeneratedData.id == data_id,
-            GeneratedData.user_id == user_id
-        ).first()
-        
-        if not data_item:
-            return False
-        
-        # 更新数据内容
-        data_item.data_content = json.dumps(new_content, ensure_ascii=False)
-        data_item.updated_at = datetime.utcnow()
+    with session_scope(db) as db:
+        try:
+            # 查找数据并验证权限
+            data_item = db.query(GeneratedData).filter(
+                GeneratedData.id == data_id,
+                GeneratedData.user_id == user_id
+            ).first()
+            
+            if not data_item:
+                return False
+            
+            # 更新数据内容
+            data_item.data_content = _dumps(new_content)
+            
+            db.commit()
+            return True
         
-        db.commit()
-        return True
-    
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+        except Exception as e:
+            db.rollback()
+            raise e
 
 
 def get_generated_data_count(
     task_id: str,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    db: Optional[Session] = None
 ) -> int:
     """
     获取任务生成的数据条数
@@ -256,27 +301,26 @@ def get_generated_data_count(
     Args:
         task_id: 任务ID
         user_id: 用户ID（可选，用于权限过滤）
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         数据条数
     """
-    db = SessionLocal()
-    try:
-        query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
+    with session_scope(db) as db:
+        # 直接对索引列计数，避免 query.count() 生成的子查询
+        query = db.query(func.count(GeneratedData.id)).filter(GeneratedData.task_id == task_id)
         
         if user_id is not None:
             query = query.filter(GeneratedData.user_id == user_id)
         
-        return query.count()
-    
-    finally:
-        db.close()
+        return query.scalar()
 
 
 def confirm_generated_data(
     data_id: int,
     user_id: int,
-    is_confirmed: bool = True
+    is_confirmed: bool = True,
+    db: Optional[Session] = None
 ) -> bool:
     """
     确认或取消确认单条生成数据
@@ -285,38 +329,37 @@ def confirm_generated_data(
         data_id: 数据ID
         user_id: 用户ID（用于权限验证）
         is_confirmed: 是否确认
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         是否操作成功
     """
-    db = SessionLocal()
-    try:
-        # 查找数据并验证权限
-        data_item = db.query(GeneratedData).filter(
-            GeneratedData.id == data_id,
-            GeneratedData.user_id == user_id
-        ).first()
-        
-        if not data_item:
-            return False
-        
-        # 更新确认状态
-        data_item.is_confirmed = is_confirmed
-        data_item.updated_at = datetime.utcnow()
+    with session_scope(db) as db:
+        try:
+            # 查找数据并验证权限
+            data_item = db.query(GeneratedData).filter(
+                GeneratedData.id == data_id,
+                GeneratedData.user_id == user_id
+            ).first()
+            
+            if not data_item:
+                return False
+            
+            # 更新确认状态
+            data_item.is_confirmed = is_confirmed
+            
+            db.commit()
+            return True
         
-        db.commit()
-        return True
-    
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+        except Exception as e:
+            db.rollback()
+            raise e
 
 
 def delete_generated_data_by_task(
     task_id: str,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    db: Optional[Session] = None
 ) -> int:
     """
     删除任务的生成数据
@@ -324,33 +367,33 @@ def delete_generated_data_by_task(
     Args:
         task_id: 任务ID
         user_id: 用户ID（可选，用于权限过滤）
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         删除的数据条数
     """
-    db = SessionLocal()
-    try:
-        query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
-        
-        if user_id is not None:
-            query = query.filter(GeneratedData.user_id == user_id)
-        
-        count = query.count()
-        query.delete()
-        db.commit()
+    with session_scope(db) as db:
+        try:
+            query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
+            
+            if user_id is not None:
+                query = query.filter(GeneratedData.user_id == user_id)
+            
+            count = query.count()
+            query.delete()
+            db.commit()
+            
+            return count
         
-        return count
-    
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+        except Exception as e:
+            db.rollback()
+            raise e
 
 
 def get_task_review_status(
     task_id: str,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    db: Optional[Session] = None
 ) -> Dict[str, Any]:
     """
     获取任务的审核状态
@@ -358,6 +401,7 @@ def get_task_review_status(
     Args:
         task_id: 任务ID
         user_id: 用户ID（可选，用于权限过滤）
+        db: 数据库会话（可选，如果不提供则自动创建）
         
     Returns:
         包含审核状态的字典:
@@ -365,21 +409,21 @@ def get_task_review_status(
         - confirmed_count: 已确认条数
         - is_fully_reviewed: 是否全部审核完毕
     """
-    db = SessionLocal()
-    try:
-        query = db.query(GeneratedData).filter(GeneratedData.task_id == task_id)
+    with session_scope(db) as db:
+        # 一条聚合查询同时统计总数和已确认数
+        query = db.query(
+            func.count(GeneratedData.id),
+            func.coalesce(func.sum(case((GeneratedData.is_confirmed == True, 1), else_=0)), 0)
+        ).filter(GeneratedData.task_id == task_id)
         
         if user_id is not None:
             query = query.filter(GeneratedData.user_id == user_id)
         
-        total_count = query.count()
-        confirmed_count = query.filter(GeneratedData.is_confirmed == True).count()
+        total_count, confirmed_count = query.one()
+        confirmed_count = int(confirmed_count)
         
         return {
             'total_count': total_count,
             'confirmed_count': confirmed_count,
             'is_fully_reviewed': total_count > 0 and confirmed_count == total_count
         }
-    
-    finally:
-        db.close()
@@ -1,10 +1,13 @@
 """
 数据库模型定义
 """
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, LargeBinary
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, relationship, deferred
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterator, Optional
+import hashlib
 import os
 
 Base = declarative_base()
@@ -26,6 +29,11 @@ class User(Base):
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
     # 关联数据文件
     data_files = relationship("DataFile", back_populates="user", cascade="all, delete-orphan")
+    
+    # 仅包含管理员的部分索引，查询管理员账号时无需扫描整个用户表
+    __table_args__ = (
+        Index('idx_users_admin', 'is_admin', sqlite_where=text('is_admin = 1')),
+    )
 
 
 class ModelConfig(Base):
@@ -73,7 +81,7 @@ class DataFile(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)  # 原始文件名
-    file_content = Column(LargeBinary, nullable=False)  # 文件内容（二进制存储）
+    file_content = deferred(Column(LargeBinary, nullable=False))  # 文件内容（二进制存储，访问时才加载）
     file_size = Column(Integer, nullable=False)  # 文件大小（字节）
     content_type = Column(String(100), default='application/x-jsonlines')  # 文件类型
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)  # 所属用户
@@ -82,6 +90,11 @@ class DataFile(Base):
     
     # 关联用户
     user = relationship("User", back_populates="data_files")
+    
+    # 按用户查重文件名时使用的组合索引
+    __table_args__ = (
+        Index('idx_data_files_user_filename', 'user_id', 'filename'),
+    )
 
 
 class GeneratedData(Base):
@@ -104,6 +117,13 @@ class GeneratedData(Base):
     # 关联用户和任务
     user = relationship("User", backref="generated_data")
     task = relationship("Task", backref="generated_data")
+    
+    # 按任务查询数据及统计审核状态、按任务/用户分页（created_at 倒序）时使用的组合索引
+    __table_args__ = (
+        Index('idx_generated_data_task_user_confirmed', 'task_id', 'user_id', 'is_confirmed'),
+        Index('idx_generated_data_task_created', 'task_id', 'created_at'),
+        Index('idx_generated_data_user_created', 'user_id', 'created_at'),
+    )
 
 
 # 数据库路径
@@ -113,34 +133,97 @@ SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 # 创建数据库引擎
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite需要这个参数
+    connect_args={
+        "check_same_thread": False,  # SQLite需要这个参数
+        "timeout": 30  # 数据库被锁（如后端正在写入）时最多等待30秒
+    },
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """新连接建立时设置 SQLite 参数：WAL 模式下读写互不阻塞，并减少每次提交的 fsync"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64MB 页缓存
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256MB 内存映射
+    finally:
+        cursor.close()
+
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 线程内复用的会话注册表，供 session_scope 使用
+ScopedSession = scoped_session(SessionLocal)
+
 
 def init_db():
     """初始化数据库，创建表"""
     # 使用 create_all 创建所有表
     # SQLAlchemy 会自动处理表已存在的情况
     
-    # 检查数据库文件在创建前的状态
-    db_path = os.path.join(os.path.dirname(__file__), 'app.db')
-    print(f"📂 init_db - 数据库路径: {db_path}")
-    print(f"📂 init_db - 数据库文件存在: {os.path.exists(db_path)}")
-    
-    # 执行创建
     Base.metadata.create_all(bind=engine)
     
-    # 检查创建后的状态
-    print(f"📂 init_db - create_all 后数据库文件存在: {os.path.exists(db_path)}")
-    if os.path.exists(db_path):
-        print(f"📊 init_db - 数据库文件大小: {os.path.getsize(db_path)} 字节")
-    else:
-        print("⚠️  init_db - 警告: 数据库文件仍未创建！")
+    # 仅在异常时输出，正常启动不再逐项打印路径和文件大小
+    if not os.path.exists(DB_PATH):
+        print(f"⚠️  init_db - 警告: 数据库文件仍未创建: {DB_PATH}")
+
+
+# 表结构签名文件，记录上次核查通过时的结构签名
+SCHEMA_SIGNATURE_PATH = f"{DB_PATH}.schema_hash"
+
+
+def _schema_signature(required_columns: dict, required_indexes: list) -> Optional[str]:
+    """
+    计算表结构签名：必需字段定义的哈希 + 数据库文件 inode + SQLite 的 schema_version
     
-    print("📊 SQLAlchemy create_all 已执行")
+    任何 DDL（包括后端 AutoMigrate）都会使 schema_version 递增，替换数据库文件会改变 inode，
+    两种情况下签名都会变化
+    """
+    try:
+        inode = os.stat(DB_PATH).st_ino
+        with engine.connect() as conn:
+            schema_version = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+    except Exception:
+        return None
+    
+    spec_hash = hashlib.sha256(repr((required_columns, required_indexes)).encode('utf-8')).hexdigest()
+    return f"{spec_hash}:{inode}:{schema_version}"
+
+
+def _read_schema_signature() -> Optional[str]:
+    """读取上次核查通过时记录的结构签名"""
+    try:
+        with open(SCHEMA_SIGNATURE_PATH, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_schema_signature(signature: Optional[str]) -> None:
+    """记录结构签名，写入失败不影响启动"""
+    if signature is None:
+        return
+    try:
+        with open(SCHEMA_SIGNATURE_PATH, 'w', encoding='utf-8') as f:
+            f.write(signature)
+    except OSError as e:
+        print(f"⚠️  写入表结构签名失败: {e}")
+
+
+def _clear_schema_signature() -> None:
+    """删除结构签名，保证下次启动重新执行完整核查"""
+    try:
+        os.remove(SCHEMA_SIGNATURE_PATH)
+    except OSError:
+        pass
 
 
 def verify_and_create_columns():
@@ -161,31 +244,6 @@ def verify_and_create_columns():
         with open(db_path, 'wb') as f:
             pass
     
-    # 检查数据库文件是否为空或损坏
-    is_corrupted = False
-    try:
-        # 尝试连接数据库
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
-        print(f"📊 当前数据库包含 {len(existing_tables)} 个表")
-        
-        # 如果没有任何表，说明需要创建
-        if len(existing_tables) == 0:
-            print(f"⚠️  数据库为空，需要创建表结构")
-            is_corrupted = True
-    except Exception as e:
-        print(f"❌ 数据库访问失败: {e}")
-        is_corrupted = True
-    
-    # 如果数据库为空或损坏，先创建所有表
-    if is_corrupted:
-        print(f"🔄 重新创建数据库表结构...")
-        init_db()
-        # 重新获取 inspector，因为表已经创建了
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
-        print(f"✅ 数据库表结构已创建，包含 {len(existing_tables)} 个表")
-    
     # 定义所有表的必需字段
     required_columns = {
         'users': [
@@ -251,6 +309,44 @@ def verify_and_create_columns():
         ],
     }
     
+    # 定义需要的索引: (索引名, 表名, 字段列表, 部分索引条件)
+    required_indexes = [
+        ('idx_users_admin', 'users', ['is_admin'], 'is_admin = 1'),
+        ('idx_data_files_user_filename', 'data_files', ['user_id', 'filename'], None),
+        ('idx_generated_data_task_user_confirmed', 'generated_data', ['task_id', 'user_id', 'is_confirmed'], None),
+        ('idx_generated_data_task_created', 'generated_data', ['task_id', 'created_at'], None),
+        ('idx_generated_data_user_created', 'generated_data', ['user_id', 'created_at'], None),
+    ]
+    
+    # 快速路径：字段定义和数据库结构都未变化时跳过整个核查
+    schema_signature = _schema_signature(required_columns, required_indexes)
+    if schema_signature is not None and _read_schema_signature() == schema_signature:
+        return
+    
+    # 检查数据库文件是否为空或损坏
+    is_corrupted = False
+    try:
+        # 尝试连接数据库
+        inspector = inspect(engine)
+        existing_tables = inspector.get_table_names()
+        
+        # 如果没有任何表，说明需要创建
+        if len(existing_tables) == 0:
+            print(f"⚠️  数据库为空，需要创建表结构")
+            is_corrupted = True
+    except Exception as e:
+        print(f"❌ 数据库访问失败: {e}")
+        is_corrupted = True
+    
+    # 如果数据库为空或损坏，先创建所有表
+    if is_corrupted:
+        print(f"🔄 重新创建数据库表结构...")
+        init_db()
+        # 重新获取 inspector，因为表已经创建了
+        inspector = inspect(engine)
+        existing_tables = inspector.get_table_names()
+        print(f"✅ 数据库表结构已创建，包含 {len(existing_tables)} 个表")
+    
     # 检查是否有任何表不存在，如果表不存在则重新创建所有表
     tables_to_create = []
     for table_name in required_columns.keys():
@@ -265,66 +361,125 @@ def verify_and_create_columns():
         # 重新检查表（因为表已经创建了）
         inspector = inspect(engine)
     
-    db = SessionLocal()
-    try:
-        # 检查每个表的字段
-        for table_name, columns in required_columns.items():
-            # 跳过不存在的表（应该不会走到这里，因为上面已经创建了）
-            if not inspector.has_table(table_name):
-                print(f"⚠️  警告: 表 {table_name} 仍然不存在")
+    # 一次性读取所有表的现有字段，避免重复执行 PRAGMA table_info
+    existing_columns_by_table = {
+        table_name: {col['name'] for col in inspector.get_columns(table_name)}
+        for table_name in required_columns
+        if inspector.has_table(table_name)
+    }
+    
+    # 先收集所有需要执行的 ALTER TABLE 语句
+    pending_alters = []
+    for table_name, columns in required_columns.items():
+        # 跳过不存在的表（应该不会走到这里，因为上面已经创建了）
+        if table_name not in existing_columns_by_table:
+            print(f"⚠️  警告: 表 {table_name} 仍然不存在")
+            continue
+        
+        existing_columns = existing_columns_by_table[table_name]
+        
+        # 检查每个必需字段
+        for col_spec in columns:
+            col_name = col_spec['name']
+            if col_name in existing_columns:
                 continue
             
-            # 获取现有字段
-            existing_columns = {col['name']: col for col in inspector.get_columns(table_name)}
+            # 字段不存在，需要添加
+            print(f"⚠️  表 {table_name} 缺少字段 {col_name}，正在添加...")
+            
+            # 构建 ALTER TABLE 语句（SQLite 语法）
+            nullable = col_spec.get('nullable', True)
+            default = col_spec.get('default')
             
-            # 检查每个必需字段
-            for col_spec in columns:
-                col_name = col_spec['name']
-                if col_name not in existing_columns:
-                    # 字段不存在，需要添加
-                    print(f"⚠️  表 {table_name} 缺少字段 {col_name}，正在添加...")
-                    
-                    # 构建 ALTER TABLE 语句（SQLite 语法）
-                    nullable = col_spec.get('nullable', True)
-                    default = col_spec.get('default')
-                    
-                    # 构建字段定义
-                    col_def = f"{col_name} {col_spec['type']}"
-                    
-                    # 添加默认值
-                    if default is not None:
-                        if isinstance(default, bool):
-                            col_def += f" DEFAULT {1 if default else 0}"
-                        elif isinstance(default, str):
-                            col_def += f" DEFAULT '{default}'"
-                        else:
-                            col_def += f" DEFAULT {default}"
-                    
-                    # SQLite 的 ALTER TABLE ADD COLUMN 不支持 NOT NULL（除非有 DEFAULT）
-                    # 如果需要 NOT NULL，必须提供默认值
-                    if not nullable and default is None:
-                        print(f"  ⚠️  警告: 字段 {col_name} 要求 NOT NULL 但没有默认值，跳过添加")
-                        continue
-                    
-                    try:
-                        # 执行 ALTER TABLE
-                        alter_sql = f"ALTER TABLE {table_name} ADD COLUMN {col_def}"
-                        db.execute(text(alter_sql))
-                        db.commit()
-                        print(f"  ✅ 成功添加字段: {table_name}.{col_name}")
-                    except Exception as e:
-                        db.rollback()
-                        print(f"  ❌ 添加字段失败: {table_name}.{col_name} - {e}")
+            # 构建字段定义
+            col_def = f"{col_name} {col_spec['type']}"
+            
+            # 添加默认值
+            if default is not None:
+                if isinstance(default, bool):
+                    col_def += f" DEFAULT {1 if default else 0}"
+                elif isinstance(default, str):
+                    col_def += f" DEFAULT '{default}'"
                 else:
-                    # 字段已存在
-                    pass
+                    col_def += f" DEFAULT {default}"
+            
+            # SQLite 的 ALTER TABLE ADD COLUMN 不支持 NOT NULL（除非有 DEFAULT）
+            # 如果需要 NOT NULL，必须提供默认值
+            if not nullable and default is None:
+                print(f"  ⚠️  警告: 字段 {col_name} 要求 NOT NULL 但没有默认值，跳过添加")
+                continue
+            
+            pending_alters.append((table_name, col_name, f"ALTER TABLE {table_name} ADD COLUMN {col_def}"))
+    
+    db = SessionLocal()
+    failed = False
+    try:
+        # pysqlite 不会在 DDL 前自动开启事务（每条 ALTER/CREATE INDEX 会各自提交），
+        # 这里显式 BEGIN，使所有变更在同一个事务中执行，最后统一提交
+        db.execute(text("BEGIN"))
+        for table_name, col_name, alter_sql in pending_alters:
+            try:
+                db.execute(text(alter_sql))
+                print(f"  ✅ 成功添加字段: {table_name}.{col_name}")
+            except Exception as e:
+                print(f"  ❌ 添加字段失败: {table_name}.{col_name} - {e}")
+                failed = True
+        
+        # 补建索引（已有数据库不会通过 create_all 自动创建）
+        for index_name, table_name, index_columns, index_where in required_indexes:
+            index_sql = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(index_columns)})"
+            if index_where:
+                index_sql += f" WHERE {index_where}"
+            try:
+                db.execute(text(index_sql))
+            except Exception as e:
+                print(f"  ❌ 创建索引失败: {index_name} - {e}")
+                failed = True
+        
+        db.commit()
+        print("✅ 数据库字段和索引核查完成")
         
-        print("\n✅ 数据库字段核查完成")
+        # 全部成功时才记录结构签名，下次启动结构未变化时可直接跳过；
+        # 有失败项时删除签名，保证下次启动重新尝试
+        if failed:
+            _clear_schema_signature()
+        else:
+            _write_schema_signature(_schema_signature(required_columns, required_indexes))
         
     except Exception as e:
         print(f"❌ 数据库字段核查失败: {e}")
         db.rollback()
+        _clear_schema_signature()
+    finally:
+        db.close()
+
+
+@contextmanager
+def session_scope(db: Optional[Session] = None) -> Iterator[Session]:
+    """
+    获取数据库会话的上下文管理器
+    
+    传入已有会话时直接复用且不关闭，由调用方负责其生命周期；
+    否则使用当前线程复用的会话，退出时 close() 结束事务并归还连接，
+    会话对象本身保留给本线程的下一次调用。
+    
+    Args:
+        db: 已有的数据库会话（可选）
+    """
+    if db is not None:
+        yield db
+        return
+    
+    db = ScopedSession()
+    if db.info.get('in_scope'):
+        # 本线程的复用会话正被外层调用占用（如流式读取尚未结束），改用独立会话
+        db = SessionLocal()
+    
+    db.info['in_scope'] = True
+    try:
+        yield db
     finally:
+        db.info['in_scope'] = False
         db.close()
 
 
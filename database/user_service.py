@@ -1,7 +1,7 @@
 """
 用户服务 - 处理用户相关的数据库操作
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 import bcrypt
 import os
 from .models import User, SessionLocal, init_db, verify_and_create_columns
@@ -16,12 +16,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hash_bytes)
 
 
+def _bcrypt_rounds() -> int:
+    """从配置读取 bcrypt 计算轮数"""
+    import sys
+    
+    # 添加配置模块路径
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from config import get_admin_config
+    
+    return get_admin_config()['bcrypt_rounds']
+
+
 def get_password_hash(password: str) -> str:
     """获取密码哈希"""
     # 将密码转换为字节
     password_bytes = password.encode('utf-8')
-    # 生成salt并加密
-    salt = bcrypt.gensalt()
+    # 生成salt并加密（轮数可配置，默认与后端的 bcrypt.DefaultCost 一致）
+    salt = bcrypt.gensalt(rounds=_bcrypt_rounds())
     hashed = bcrypt.hashpw(password_bytes, salt)
     # 返回字符串格式
     return hashed.decode('utf-8')
@@ -32,6 +45,14 @@ def get_user_by_username(db: Session, username: str) -> User:
     return db.query(User).filter(User.username == username).first()
 
 
+def get_user_with_relations(db: Session, username: str) -> User:
+    """根据用户名获取用户，并预加载任务和数据文件（各一条 IN 查询，避免逐条懒加载）"""
+    return db.query(User).options(
+        selectinload(User.tasks),
+        selectinload(User.data_files)
+    ).filter(User.username == username).first()
+
+
 def authenticate_user(db: Session, username: str, password: str) -> User:
     """验证用户登录"""
     user = get_user_by_username(db, username)
@@ -44,12 +65,13 @@ def authenticate_user(db: Session, username: str, password: str) -> User:
     return user
 
 
+_BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+
 def is_bcrypt_hash(password: str) -> bool:
     """判断字符串是否是 bcrypt 哈希值"""
-    # bcrypt 哈希值通常以 $2a$, $2b$, $2y$ 开头，长度为 60
-    return (password.startswith('$2a$') or 
-            password.startswith('$2b$') or 
-            password.startswith('$2y$')) and len(password) == 60
+    # bcrypt 哈希值通常以 $2a$, $2b$, $2y$ 开头，长度为 60；先判断长度，再一次性匹配前缀
+    return len(password) == 60 and password.startswith(_BCRYPT_PREFIXES)
 
 
 def create_user(db: Session, username: str, password: str, is_admin: bool = False) -> User:
@@ -124,8 +146,6 @@ def init_default_admin():
                 admin_user.is_admin = True
                 db.commit()
                 print(f"已将 {admin_username} 用户更新为管理员")
-            else:
-                print("管理员账号已存在")
     except Exception as e:
         print(f"初始化管理员账号时出错: {e}")
         db.rollback()
@@ -140,30 +160,16 @@ def init_database():
     2. 核查并创建缺失的字段
     3. 初始化默认管理员账号
     """
-    print("\n=== 开始初始化数据库 ===")
-    
-    # 检查数据库文件状态
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'app.db')
-    print(f"📂 数据库路径: {db_path}")
-    print(f"📂 数据库文件存在: {os.path.exists(db_path)}")
+    print("=== 开始初始化数据库 ===")
     
     # 1. 创建所有表
-    print("\n1. 创建数据库表...")
     init_db()
-    print("✅ 表结构创建完成")
-    
-    # 检查创建后的状态
-    print(f"📂 创建表后数据库文件存在: {os.path.exists(db_path)}")
-    if os.path.exists(db_path):
-        print(f"📊 数据库文件大小: {os.path.getsize(db_path)} 字节")
     
     # 2. 核查和创建缺失的字段
-    print("\n2. 核查数据库字段...")
     verify_and_create_columns()
     
     # 3. 初始化默认管理员
-    print("\n3. 初始化默认管理员账号...")
     init_default_admin()
     
-    print("\n=== 数据库初始化完成 ===\n")
+    print("=== 数据库初始化完成 ===")
 
@@ -5,15 +5,84 @@
 """
 
 import json
-import math
-from typing import List, Dict, Any, Tuple
+import queue
+import re
+import threading
+from typing import List, Dict, Any, Tuple, Iterator
 import sys
 import os
 
 # 添加数据库模块路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from database import SessionLocal
-from database.file_service import get_file_content
+from database.file_service import iter_file_content
+
+try:
+    import orjson
+except ImportError:  # orjson 未安装时回退到标准库 json
+    orjson = None
+
+# 连续20位及以上的数字可能超出64位整数范围，orjson 会将其解析为 float 而丢失精度
+_LONG_DIGITS = re.compile(rb'\d{20}')
+
+
+def _loads(line: bytes) -> Any:
+    """解析单行JSON，优先使用 orjson；含超长数字（如卡号、长ID）时使用标准库以保留整数精度"""
+    if orjson is not None and not _LONG_DIGITS.search(line):
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+# 后台预读的数据块数量
+_CHUNK_PREFETCH_DEPTH = 2
+
+
+def _prefetch_chunks(chunks: Iterator[bytes], depth: int = _CHUNK_PREFETCH_DEPTH) -> Iterator[bytes]:
+    """
+    在后台线程中预读数据块，使下一块的数据库读取与当前块的JSON解析重叠进行
+    
+    读取线程中的异常会在消费方重新抛出；消费方提前退出时读取线程随之停止
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+        finally:
+            # 及时关闭底层 BLOB 句柄，保证在会话关闭前释放
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+    
+    thread = threading.Thread(target=produce, name='file-reader-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
 
 
 class FileReader:
@@ -36,26 +105,35 @@ class FileReader:
         
         db = SessionLocal()
         try:
-            # 从数据库获取文件内容
-            file_content = get_file_content(db, file_id, user_id)
-            if not file_content:
+            # 从数据库按块读取文件内容（后台线程预读，与解析重叠进行）
+            chunks = iter_file_content(db, file_id, user_id)
+            if chunks is None:
                 error_msg = f"数据库文件不存在或无权访问 (file_id={file_id}, user_id={user_id})"
                 errors.append(error_msg)
                 return [], errors
             
-            # 解析文件内容（假设是JSONL格式）
-            content_str = file_content.decode('utf-8')
-            for line_num, line in enumerate(content_str.strip().split('\n'), 1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    samples.append(data)
-                except json.JSONDecodeError as e:
-                    error_msg = f"第{line_num}行JSON解析失败: {e}"
-                    errors.append(error_msg)
-                    print(error_msg)
+            # 解析文件内容（假设是JSONL格式），边读取边按行解析，只保留未完成的最后一行
+            has_content = False
+            buffer = b''
+            line_num = 0
+            for chunk in _prefetch_chunks(chunks):
+                has_content = True
+                buffer += chunk
+                # splitlines 一次扫描即可切分，同时兼容 \r\n 和 \r 换行；
+                # 末尾未以换行结束的部分留到下一块继续拼接
+                lines = buffer.splitlines(keepends=True)
+                buffer = lines.pop() if lines and not lines[-1].endswith(b'\n') else b''
+                for line in lines:
+                    line_num += 1
+                    FileReader._parse_line(line, line_num, samples, errors)
+            
+            if not has_content:
+                error_msg = f"数据库文件不存在或无权访问 (file_id={file_id}, user_id={user_id})"
+                errors.append(error_msg)
+                return [], errors
+            
+            if buffer:
+                FileReader._parse_line(buffer, line_num + 1, samples, errors)
             
             return samples, errors
             
@@ -66,6 +144,19 @@ class FileReader:
         finally:
             db.close()
     
+    @staticmethod
+    def _parse_line(line: bytes, line_num: int, samples: List[Dict[str, Any]], errors: List[str]) -> None:
+        """解析单行JSON，成功则追加到样本列表，失败则记录错误"""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            samples.append(_loads(line))
+        except ValueError as e:  # 涵盖 json/orjson 的 JSONDecodeError 以及非法 UTF-8 的 UnicodeDecodeError
+            error_msg = f"第{line_num}行JSON解析失败: {e}"
+            errors.append(error_msg)
+            print(error_msg)
+    
     @staticmethod
     def read_samples(file_id: int, user_id: int) -> Tuple[List[Dict[str, Any]], List[str]]:
         """
@@ -93,23 +184,13 @@ class FileReader:
         Returns:
             分割后的样本列表的列表
         """
-        if not samples:
-            return [[] for _ in range(num_parts)]
-        
         total_samples = len(samples)
-        samples_per_part = math.ceil(total_samples / num_parts)
-        
-        parts = []
-        for i in range(num_parts):
-            start_idx = i * samples_per_part
-            end_idx = min((i + 1) * samples_per_part, total_samples)
-            
-            if start_idx >= total_samples:
-                parts.append([])
-            else:
-                parts.append(samples[start_idx:end_idx])
         
-        return parts
+        # 均衡分配：各部分大小最多相差1，避免按 ceil 切分时尾部服务分到的样本过少或为空
+        return [
+            samples[i * total_samples // num_parts:(i + 1) * total_samples // num_parts]
+            for i in range(num_parts)
+        ]
 
 
 # 注意：OutputWriter 类已删除，数据现在直接保存到数据库
@@ -91,12 +91,20 @@ class PipelineDataGenerator:
                 # 使用Hash格式更新进度数据（避免覆盖input_chars和output_chars字段）
                 # 这些字段由Go后端管理，Python不应该更新它们
                 excluded_keys = {'input_chars', 'output_chars'}
-                for key, value in progress_data.items():
-                    if key not in excluded_keys:
-                        # 将值转换为JSON字符串（保持数据结构）
-                        redis_client.hset(redis_key, key, json.dumps(value, ensure_ascii=False))
+                fields = {key: value for key, value in progress_data.items() if key not in excluded_keys}
+                if not fields:
+                    return
+
+                pipe = redis_client.pipeline(transaction=False)
+                # 将值转换为JSON字符串（保持数据结构）
+                pipe.hset(redis_key, mapping={
+                    key: json.dumps(value, ensure_ascii=False) for key, value in fields.items()
+                })
                 # 设置过期时间（24小时）
-                redis_client.expire(redis_key, 86400)
+                pipe.expire(redis_key, 86400)
+                # 发布进度变更，订阅方（/progress_stream）无需轮询即可收到更新
+                pipe.publish(f"task_progress_events:{task_id}", json.dumps(fields, ensure_ascii=False))
+                pipe.execute()
             except Exception as e:
                 print(f"⚠️  Redis 更新进度失败: {e}")
         
@@ -26,9 +26,12 @@ def _get_thread_random() -> random.Random:
     获取线程局部的随机数生成器
     每个线程拥有独立的 Random 实例，避免多线程竞争
     """
-    if not hasattr(_thread_local, 'rng'):
-        _thread_local.rng = random.Random()
-    return _thread_local.rng
+    rng = getattr(_thread_local, 'rng', None)
+    if rng is None:
+        # 用单调时钟和线程ID做种子，省去默认从 os.urandom 读取 2500 字节的系统调用；
+        # 这里只用于挑选方向和生成示例数据，不需要密码学强度的随机性
+        rng = _thread_local.rng = random.Random(time.monotonic_ns() ^ threading.get_ident())
+    return rng
 
 # 导入工具函数
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -38,7 +41,7 @@ from config.tools import (
 )
 from config import get_default_services, get_default_model, get_model_services_config
 # 导入模型调用函数
-from call_model.model_call import call_model_api
+from call_model.model_call import call_model_via_proxy_async
 
 # 从配置获取默认值
 _default_services = get_default_services()
@@ -108,7 +111,7 @@ class DataGenerator:
         pass
     
     async def close_session(self):
-        """关闭（保留兼容性）"""
+        """关闭（保留兼容性，共享的模型调用会话由 main 在事件循环结束前关闭）"""
         pass
     
     async def call_api(self, prompt: str, temperature: float = 0.6) -> Optional[str]:
@@ -121,31 +124,27 @@ class DataGenerator:
         ]
 
         try:
-            # 使用 call_model_api 进行调用（在线程池中运行同步函数）
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: call_model_api(
-                    api_url=self.api_base,
-                    api_key=self.api_key,
-                    messages=messages,
-                    model=self.model,
-                    temperature=temperature,
-                    max_tokens=self.max_tokens,
-                    retry_times=self.retry_times,
-                    timeout=self.timeout,
-                    is_vllm=self.is_vllm,
-                    top_p=self.top_p,
-                    use_proxy=self.use_proxy,
-                    task_id=self.task_id
-                )
+            # 异步调用后端代理，不占用线程池（默认线程池大小会限制实际并发数）
+            response = await call_model_via_proxy_async(
+                api_url=self.api_base,
+                api_key=self.api_key,
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=self.max_tokens,
+                retry_times=self.retry_times,
+                timeout=self.timeout,
+                is_vllm=self.is_vllm,
+                top_p=self.top_p,
+                task_id=self.task_id
             )
 
             # 检查是否为错误响应
             if response and (response.startswith("模型调用失败") or
                             response.startswith("API Connection Error") or
                             response.startswith("Rate Limit Error") or
-                            response.startswith("代理调用失败")):
+                            response.startswith("代理调用失败") or
+                            response.startswith("后端代理不可用")):
                 print(f"API调用失败: {response}")
                 with self._stats_lock:
                     self.stats['api_errors'] += 1
@@ -291,22 +290,19 @@ class DataGenerator:
                 print(f"❌ turns不是列表类型，跳过该数据")
                 return 0, 0
             
-            for turn in turns:
-                if not isinstance(turn, dict):
-                    continue
-                if turn.get('role') == 'Assistant':
-                    assistant_text = turn.get('text', '')
-                    break
-            
+            # 单次遍历同时统计角色数量并取第一条Assistant回答
             Assistant = 0
             Human = 0
+            found_assistant = False
             for turn in turns:
                 if not isinstance(turn, dict):
                     continue
-                role = turn.get('role', '')
+                raw_role = turn.get('role', '')
+                if not found_assistant and raw_role == 'Assistant':
+                    assistant_text = turn.get('text', '')
+                    found_assistant = True
                 # 处理role字段：去除首尾空格
-                if isinstance(role, str):
-                    role = role.strip()
+                role = raw_role.strip() if isinstance(raw_role, str) else raw_role
                 if role == 'Assistant':
                     Assistant += 1
                 elif role == 'Human':
@@ -351,8 +347,10 @@ class DataGenerator:
         try:
             model_score = 0
 
-            # 模型评分
+            # 模型评分（空内容不构建提示词，也不调用模型）
             eval_prompt = self.filter_prompt(content)
+            if not eval_prompt:
+                return 0, "内容为空"
             eval_response_list = []
             for _ in range(1):
                 eval_response = await self.call_api(eval_prompt, temperature=0.2)
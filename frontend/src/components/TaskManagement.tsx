@@ -29,7 +29,9 @@ export default function TaskManagement() {
   const [taskStatus, setTaskStatus] = useState<'idle' | 'running' | 'finished' | 'error'>('idle');
   const [taskProgress, setTaskProgress] = useState<TaskProgressData | null>(null);
   const progressIntervalRef = useRef<number | null>(null);
+  const pollGenerationRef = useRef(0);  // 轮询代次，停止或重新开始轮询后旧的请求回调不再续约
   const sseAbortControllerRef = useRef<AbortController | null>(null);  // 用于跟踪 SSE 连接
+  const progressStreamAbortRef = useRef<AbortController | null>(null);  // 用于跟踪进度推送流
   const [showAdvancedSettings, setShowAdvancedSettings] = useState(false);
   const [showStopConfirm, setShowStopConfirm] = useState(false);
 
@@ -54,8 +56,13 @@ export default function TaskManagement() {
     
     // 清理进度轮询和 SSE 连接
     return () => {
+      pollGenerationRef.current++;
       if (progressIntervalRef.current) {
-        clearInterval(progressIntervalRef.current);
+        clearTimeout(progressIntervalRef.current);
+      }
+      if (progressStreamAbortRef.current) {
+        progressStreamAbortRef.current.abort();
+        progressStreamAbortRef.current = null;
       }
       if (sseAbortControllerRef.current) {
         sseAbortControllerRef.current.abort();
@@ -99,59 +106,130 @@ export default function TaskManagement() {
         setProgress([]);
         setTaskProgress(null);
         connectProgress(result.task_id);
-        startProgressPolling(result.task_id);
+        startProgressStream(result.task_id);
       }
     } catch (err) {
       console.error('检查活动任务失败:', err);
     }
   };
   
-  // 开始轮询任务进度
+  // 开始轮询任务进度（间隔由服务端根据进度是否变化给出，未变化时逐步退避）
   const startProgressPolling = (taskId: string) => {
     // 清除之前的轮询
     if (progressIntervalRef.current) {
-      clearInterval(progressIntervalRef.current);
+      clearTimeout(progressIntervalRef.current);
     }
-    
+
+    const generation = ++pollGenerationRef.current;
+    let hint: { since?: string; interval_ms?: number } = {};
+    const poll = async () => {
+      const progress = await fetchTaskProgress(taskId, hint);
+      if (generation !== pollGenerationRef.current) return;
+      if (progress && (progress.status === 'completed' || progress.status === 'failed')) {
+        progressIntervalRef.current = null;
+        return;
+      }
+      const delay = progress?.retry_after_ms ?? 2000;
+      hint = { since: progress?.version, interval_ms: progress?.retry_after_ms };
+      progressIntervalRef.current = setTimeout(poll, delay);
+    };
+
     // 立即获取一次
-    fetchTaskProgress(taskId);
-    
-    // 每2秒轮询一次
-    progressIntervalRef.current = setInterval(() => {
-      fetchTaskProgress(taskId);
-    }, 2000);
+    poll();
   };
   
+  // 订阅任务进度推送（仅在进度变化时收到更新），连接失败时回退到轮询
+  const startProgressStream = (taskId: string) => {
+    stopProgressPolling();
+
+    const token = localStorage.getItem('access_token');
+    if (!token) {
+      startProgressPolling(taskId);
+      return;
+    }
+
+    const abortController = new AbortController();
+    progressStreamAbortRef.current = abortController;
+    const encodedTaskId = encodeURIComponent(taskId);
+
+    fetch(`/api/progress_stream/${encodedTaskId}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+      signal: abortController.signal,
+    })
+      .then(async (response) => {
+        const reader = response.body?.getReader();
+        if (!response.ok || !reader) {
+          console.warn('[startProgressStream] 进度推送不可用，回退到轮询:', response.status);
+          progressStreamAbortRef.current = null;
+          startProgressPolling(taskId);
+          return;
+        }
+
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { done, value } = await reader.read();
+          if (done) break;
+
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop() || '';
+
+          for (const line of lines) {
+            if (!line.startsWith('data:')) continue;
+            try {
+              const data = JSON.parse(line.substring(5).trimStart());
+              if (data.type === 'progress' && data.progress) {
+                setTaskProgress(data.progress);
+              }
+            } catch (err) {
+              console.error('[startProgressStream] 解析进度数据失败:', err, 'line:', line);
+            }
+          }
+        }
+        progressStreamAbortRef.current = null;
+      })
+      .catch((err) => {
+        if (err.name !== 'AbortError') {
+          console.error('[startProgressStream] 读取进度推送失败，回退到轮询:', err);
+          progressStreamAbortRef.current = null;
+          startProgressPolling(taskId);
+        }
+      });
+  };
+
   // 停止轮询任务进度
   const stopProgressPolling = () => {
+    pollGenerationRef.current++;
     if (progressIntervalRef.current) {
-      clearInterval(progressIntervalRef.current);
+      clearTimeout(progressIntervalRef.current);
       progressIntervalRef.current = null;
     }
+    if (progressStreamAbortRef.current) {
+      progressStreamAbortRef.current.abort();
+      progressStreamAbortRef.current = null;
+    }
   };
   
   // 获取任务进度
-  const fetchTaskProgress = async (taskId: string) => {
+  const fetchTaskProgress = async (taskId: string, hint?: { since?: string; interval_ms?: number }) => {
     try {
       console.log('[fetchTaskProgress] 获取任务进度:', taskId);
-      const result = await taskService.getTaskProgress(taskId);
+      const result = await taskService.getTaskProgress(taskId, hint);
       console.log('[fetchTaskProgress] 进度数据:', result);
       if (result.success && result.progress) {
         console.log('[fetchTaskProgress] 设置进度:', result.progress);
         setTaskProgress(result.progress);
-
-        // 如果任务完成，停止轮询
-        if (result.progress.status === 'completed' || result.progress.status === 'failed') {
-          console.log('[fetchTaskProgress] 任务完成，停止轮询');
-          stopProgressPolling();
-        }
-      } else {
-        console.log('[fetchTaskProgress] 没有进度数据', result);
+        return result.progress;
       }
+      console.log('[fetchTaskProgress] 没有进度数据', result);
     } catch (err) {
       // 静默失败，不影响用户体验
       console.error('[fetchTaskProgress] 获取任务进度失败:', err);
     }
+    return null;
   };
 
   const connectProgress = (taskId: string) => {
@@ -209,9 +287,10 @@ export default function TaskManagement() {
             buffer = lines.pop() || '';
 
             for (const line of lines) {
-              if (line.startsWith('data: ')) {
+              // SSE 规范中 "data:" 后的空格可选
+              if (line.startsWith('data:')) {
                 try {
-                  const data = JSON.parse(line.substring(6));
+                  const data = JSON.parse(line.substring(5).trimStart());
                   console.log('[connectProgress] 收到事件:', data.type, data);
                   if (data.type === 'connected') {
                     setProgress((prev) => [...prev, `[系统] ${data.message || 'SSE连接已建立'}`]);
@@ -292,7 +371,7 @@ export default function TaskManagement() {
       setTaskProgress(null);
       setSuccess('任务已启动');
       connectProgress(result.task_id);
-      startProgressPolling(result.task_id);
+      startProgressStream(result.task_id);
     } catch (err: any) {
       console.error('[handleSubmit] 启动任务出错:', err);
       setError(err.response?.data?.error || err.message || '启动任务失败');
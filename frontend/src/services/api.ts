@@ -109,7 +109,8 @@ export const taskService = {
   },
 
   // 获取任务进度（从Redis）
-  getTaskProgress: async (taskId: string): Promise<{
+  // hint 为上次响应中的 version 与 retry_after_ms，服务端据此给出下次轮询间隔
+  getTaskProgress: async (taskId: string, hint?: { since?: string; interval_ms?: number }): Promise<{
     success: boolean;
     progress?: {
       task_id: string;
@@ -122,11 +123,13 @@ export const taskService = {
       source: string;
       input_chars?: number;
       output_chars?: number;
+      version?: string;
+      retry_after_ms?: number;
     };
     error?: string;
   }> => {
     const encodedTaskId = encodeURIComponent(taskId);
-    const response = await api.get<{ code: number; message: string; data: { success: boolean; progress?: any } }>(`/progress_unified/${encodedTaskId}`);
+    const response = await api.get<{ code: number; message: string; data: { success: boolean; progress?: any } }>(`/progress_unified/${encodedTaskId}`, { params: hint });
     return response.data.data;
   },
 };
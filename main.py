@@ -14,6 +14,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from develop.pipeline_gen import PipelineDataGenerator
 from config import get_default_services, get_default_model
+from call_model.model_call import close_async_session
 
 
 async def main():
@@ -70,28 +71,32 @@ async def main():
     task_id = args.task_id
     
     # 开始生成数据
-    await generator.generate_data(
-        task_id=task_id,
-        user_id=args.user_id,
-        batch_size=args.batch_size,
-        max_concurrent=args.max_concurrent,
-        min_score=args.min_score,
-        task_type=args.task_type,
-        variants_per_sample=args.variants_per_sample,
-        sample_retry_times=3,  # 默认样本重试3次
-        data_rounds=args.data_rounds,
-        model=args.model,
-        retry_times=args.retry_times,
-        special_prompt=args.special_prompt,
-        directions=args.directions,
-        api_key=args.api_key,
-        is_vllm=args.is_vllm,
-        use_proxy=args.use_proxy,
-        top_p=args.top_p,
-        max_tokens=args.max_tokens,
-        timeout=args.timeout,
-        file_id=args.file_id
-    )
+    try:
+        await generator.generate_data(
+            task_id=task_id,
+            user_id=args.user_id,
+            batch_size=args.batch_size,
+            max_concurrent=args.max_concurrent,
+            min_score=args.min_score,
+            task_type=args.task_type,
+            variants_per_sample=args.variants_per_sample,
+            sample_retry_times=3,  # 默认样本重试3次
+            data_rounds=args.data_rounds,
+            model=args.model,
+            retry_times=args.retry_times,
+            special_prompt=args.special_prompt,
+            directions=args.directions,
+            api_key=args.api_key,
+            is_vllm=args.is_vllm,
+            use_proxy=args.use_proxy,
+            top_p=args.top_p,
+            max_tokens=args.max_tokens,
+            timeout=args.timeout,
+            file_id=args.file_id
+        )
+    finally:
+        # 关闭所有生成器共享的模型调用会话
+        await close_async_session()
 
 
 if __name__ == "__main__":